@@ -17,6 +17,9 @@ from app.models.post_models import Post
 from app.models.comment_models import Comment
 from app.models.tag_models import Tag
 from app.models.link_models import PostTagLink
+from app.models.count_models import CountSummary
+from app.models.upload_models import Upload
+from app.models.job_models import BackgroundJob
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,31 @@
+"""add_post_featured_image_variants
+
+Revision ID: 0b7d4e2f9c18
+Revises: f3c9d1b7a205
+Create Date: 2026-10-18 15:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d4e2f9c18'
+down_revision: Union[str, None] = 'f3c9d1b7a205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # add_column trực tiếp (không batch) để giữ nguyên bảng 'post' và các trigger post_fts.
+    # Ảnh đã upload trước đây không có biến thể (NULL): template dùng featured_image_url như cũ.
+    op.add_column('post', sa.Column('featured_image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('post', 'featured_image_variants')
@@ -0,0 +1,43 @@
+"""add_upload_table
+
+Revision ID: 1c8e5a3d7f42
+Revises: 0b7d4e2f9c18
+Create Date: 2026-10-18 16:21:07.542913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c8e5a3d7f42'
+down_revision: Union[str, None] = '0b7d4e2f9c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # File upload trước đây (tên {stem}_{uuid8}) không có bản ghi ở đây và vẫn được xóa trực tiếp như cũ.
+    op.create_table('upload',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('path', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('variants', sa.JSON(), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_key'), 'upload', ['key'], unique=True)
+    op.create_index(op.f('ix_upload_path'), 'upload', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_upload_path'), table_name='upload')
+    op.drop_index(op.f('ix_upload_key'), table_name='upload')
+    op.drop_table('upload')
@@ -0,0 +1,65 @@
+"""add_post_fts_search_index
+
+Revision ID: 5c1e9a7d2b40
+Revises: a3ef43f3faa6
+Create Date: 2026-10-18 09:12:41.208314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2b40'
+down_revision: Union[str, None] = 'a3ef43f3faa6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 chỉ có trên SQLite; các DB khác tiếp tục dùng ILIKE trong crud_post.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    # Bảng FTS dạng external content: chỉ lưu index, nội dung đọc từ bảng 'post'.
+    op.execute(
+        "CREATE VIRTUAL TABLE post_fts USING fts5("
+        "title, content, content='post', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+
+    # Trigger giữ index đồng bộ với mọi thao tác ghi vào 'post'.
+    op.execute(
+        "CREATE TRIGGER post_fts_ai AFTER INSERT ON post BEGIN "
+        "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER post_fts_ad AFTER DELETE ON post BEGIN "
+        "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER post_fts_au AFTER UPDATE OF title, content ON post BEGIN "
+        "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+        "END"
+    )
+
+    # Index các bài viết đã có.
+    op.execute("INSERT INTO post_fts(post_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS post_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS post_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS post_fts_ai")
+    op.execute("DROP TABLE IF EXISTS post_fts")
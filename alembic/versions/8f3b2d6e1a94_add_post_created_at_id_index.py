@@ -0,0 +1,30 @@
+"""add_post_created_at_id_index
+
+Revision ID: 8f3b2d6e1a94
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-18 10:02:17.554920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2d6e1a94'
+down_revision: Union[str, None] = '5c1e9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Index phục vụ ORDER BY created_at DESC, id DESC và phân trang keyset (cursor).
+    op.create_index('ix_post_created_at_id', 'post', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_created_at_id', table_name='post')
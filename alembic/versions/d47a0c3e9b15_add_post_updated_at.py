@@ -0,0 +1,34 @@
+"""add_post_updated_at
+
+Revision ID: d47a0c3e9b15
+Revises: 8f3b2d6e1a94
+Create Date: 2026-10-18 11:26:03.418772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd47a0c3e9b15'
+down_revision: Union[str, None] = '8f3b2d6e1a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Thêm cột trực tiếp (không dùng batch_alter_table) để SQLite không tạo lại bảng 'post'
+    # và làm mất các trigger của post_fts. Default hằng số chỉ để thỏa NOT NULL, sau đó backfill.
+    op.add_column('post', sa.Column('updated_at', sa.DateTime(), nullable=False, server_default='1970-01-01 00:00:00'))
+    op.execute("UPDATE post SET updated_at = created_at")
+    op.create_index(op.f('ix_post_updated_at'), 'post', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_post_updated_at'), table_name='post')
+    op.drop_column('post', 'updated_at')
@@ -0,0 +1,49 @@
+"""add_count_summary_table
+
+Revision ID: e8b2f4a61c37
+Revises: d47a0c3e9b15
+Create Date: 2026-10-18 12:04:51.730126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2f4a61c37'
+down_revision: Union[str, None] = 'd47a0c3e9b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('count_summary',
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=150), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+    # Khởi tạo bộ đếm từ dữ liệu hiện có; từ đây các hàm CRUD cập nhật chúng theo từng thao tác ghi.
+    op.execute("INSERT INTO count_summary (key, value) SELECT 'posts', COUNT(*) FROM post")
+    op.execute("INSERT INTO count_summary (key, value) SELECT 'comments', COUNT(*) FROM comment")
+    op.execute("INSERT INTO count_summary (key, value) SELECT 'users', COUNT(*) FROM \"user\"")
+    op.execute("INSERT INTO count_summary (key, value) SELECT 'tags', COUNT(*) FROM tag")
+    op.execute(
+        "INSERT INTO count_summary (key, value) "
+        "SELECT 'posts:tag:' || tag.name, COUNT(*) FROM posttaglink "
+        "JOIN tag ON tag.id = posttaglink.tag_id GROUP BY tag.name"
+    )
+    op.execute(
+        "INSERT INTO count_summary (key, value) "
+        "SELECT 'posts:author:' || owner_id, COUNT(*) FROM post "
+        "WHERE owner_id IS NOT NULL GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('count_summary')
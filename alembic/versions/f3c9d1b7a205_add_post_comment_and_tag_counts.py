@@ -0,0 +1,39 @@
+"""add_post_comment_and_tag_counts
+
+Revision ID: f3c9d1b7a205
+Revises: e8b2f4a61c37
+Create Date: 2026-10-18 12:48:19.064582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d1b7a205'
+down_revision: Union[str, None] = 'e8b2f4a61c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # add_column trực tiếp (không batch) để giữ nguyên bảng 'post' và các trigger post_fts.
+    op.add_column('post', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('post', sa.Column('tag_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill; scripts/backfill_post_counts.py làm lại bước này nếu số đếm bị lệch.
+    op.execute(
+        "UPDATE post SET "
+        "comment_count = (SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id), "
+        "tag_count = (SELECT COUNT(*) FROM posttaglink WHERE posttaglink.post_id = post.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('post', 'tag_count')
+    op.drop_column('post', 'comment_count')
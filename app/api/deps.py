@@ -1,20 +1,26 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status, Cookie, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.session import get_session_local
+from app.db.session import get_session_local, get_async_session_local, async_engine
 from app.core import security
 from app.core.config import settings
 from app.models.user_models import User
 from app.crud import crud_user
+from app.crud.aio import crud_user as aio_crud_user
 
 
 def get_db() -> Generator[Session, None, None]:
     yield from get_session_local()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async for session in get_async_session_local():
+        yield session
+
 async def get_token_data(
     request: Request,
     token_from_cookie: Optional[str] = Cookie(None, alias="access_token_cookie"),
@@ -28,19 +34,35 @@ async def get_token_data(
         return token_from_header
     return None
 
+async def _load_user_data(username: str) -> Optional[dict]:
+    # Session chỉ mở khi cache miss và đóng ngay sau khi đọc xong, để route dùng get_db
+    # không giữ thêm một connection async suốt request.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = await aio_crud_user.get_user_by_username(session=session, username=username)
+    return user.model_dump() if user is not None else None
+
 async def get_optional_current_user(
-    session: Session = Depends(get_db),
     token_str: Optional[str] = Depends(get_token_data)
 ) -> Optional[User]:
     if not token_str:
         return None
 
-    username = security.decode_access_token(token=token_str)
-    if username is None:
+    payload = security.decode_access_token_payload(token=token_str)
+    if payload is None:
         return None
+    username = payload["sub"]
+
+    user_data = crud_user.user_cache.get(username)
+    if user_data is None:
+        user_data = await _load_user_data(username)
+        if user_data is None:
+            return None
+        crud_user.user_cache.set(username, user_data)
 
-    user = crud_user.get_user_by_username(session=session, username=username)
-    return user
+    if "uid" in payload and payload["uid"] != user_data["id"]:
+        return None
+    # Trả về một instance mới mỗi request để handler không sửa nhầm bản trong cache.
+    return User(**user_data)
 
 async def get_current_user(
     current_user_optional: Optional[User] = Depends(get_optional_current_user)
@@ -59,8 +81,20 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user)
 ) -> User:
+    # Không tin user_cache ở đây: cache là theo worker nên có thể vẫn giữ quyền admin vừa bị thu hồi.
+    user_data = await _load_user_data(current_user.username)
+    if user_data is None or user_data["id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    crud_user.user_cache.set(current_user.username, user_data)
+    current_user = User(**user_data)
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
 from app.api import deps
 from app.crud import crud_comment, crud_post
+from app.crud import aio
 from app.models.comment_models import CommentCreate, CommentRead, CommentReadWithAuthor
 from app.models.user_models import User
 
@@ -11,7 +13,7 @@ from app.models.user_models import User
 router = APIRouter()
 
 @router.post("/posts/{post_id}/comments/", response_model=CommentRead, status_code=status.HTTP_201_CREATED)
-async def create_comment_for_post(
+def create_comment_for_post(
     *,
     post_id: int,
     comment_in: CommentCreate,
@@ -38,24 +40,25 @@ async def create_comment_for_post(
 async def list_comments_for_post(
     *,
     post_id: int,
-    session: Session = Depends(deps.get_db),
+    session: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 20
 ):
-    post = crud_post.get_db_post(session=session, post_id=post_id)
+    post = await aio.crud_post.get_db_post(session=session, post_id=post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Post with id {post_id} not found.",
         )
 
-    comments_from_db = crud_comment.get_db_comments_for_post(
-        session=session, post_id=post_id, skip=skip, limit=limit
+    comments_from_db = await aio.crud_comment.get_db_comments_for_post(
+        session=session, post_id=post_id, skip=skip, limit=limit,
+        options=crud_comment.COMMENT_LOAD_WITH_OWNER
     )
     return comments_from_db
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_200_OK, name="delete_comment_api")
-async def delete_comment_api(
+def delete_comment_api(
     *,
     comment_id: int,
     session: Session = Depends(deps.get_db),
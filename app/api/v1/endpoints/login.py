@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
@@ -8,6 +9,7 @@ from app.api import deps
 from app.core import security
 from app.core.config import settings
 from app.crud import crud_user
+from app.crud import aio
 
 class Token(BaseModel):
     access_token: str
@@ -17,14 +19,12 @@ router = APIRouter()
 
 @router.post('/token', response_model=Token)
 async def login_for_access_token(
-    session: Session = Depends(deps.get_db),
+    session: AsyncSession = Depends(deps.get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    print(f"Attempting login for username: {form_data.username}")
-    print(f"Password received (plain): {form_data.password}")
-    user = crud_user.get_user_by_username(session, username=form_data.username)
+    user = await aio.crud_user.get_user_by_username(session, username=form_data.username)
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -33,7 +33,7 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user.username},
+        data=security.access_token_claims(user),
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
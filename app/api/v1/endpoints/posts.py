@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlmodel import Session
-from typing import List, Optional
+from typing import List, Optional, Literal, Union
 
 from app.crud import crud_post
 from app.models import post_models, user_models
 from app.api import deps
+from app.core import http_cache
 from app.models.pagination import Page
-from app.models.post_models import Post, PostCreate, PostUpdate, PostRead, PostReadWithDetails
+from app.models.post_models import Post, PostCreate, PostUpdate, PostRead, PostReadWithDetails, PostSummary
 from app.models.tag_models import TagRead
+from app.utils.file_upload import SavedImage, acquire_upload, release_upload
 
 router = APIRouter()
 
+def _acquire_featured_image(session: Session, featured_image_url: Optional[str]) -> Optional[SavedImage]:
+    """
+    Ảnh trong uploads/ được đếm tham chiếu (bảng upload): bài viết dùng ảnh nào phải giữ một tham chiếu
+    tới ảnh đó, nếu không khi xóa bài sẽ giảm ref_count của bài khác và có thể xóa file đang dùng chung.
+    URL ngoài (http...) không cần tham chiếu. Path trong uploads/ không có trong bảng upload bị từ chối.
+    """
+    if not featured_image_url or not featured_image_url.startswith("uploads/"):
+        return None
+    saved_image = acquire_upload(session, featured_image_url)
+    if saved_image is None:
+        raise HTTPException(status_code=400, detail="featured_image_url is not a known uploaded image")
+    return saved_image
+
 @router.post("/", response_model=PostReadWithDetails, status_code=201)
 def create_post_endpoint(
     *,
@@ -18,25 +33,82 @@ def create_post_endpoint(
     post_in: post_models.PostCreate,
     current_user: user_models.User = Depends(deps.get_current_active_user)
 ):
-    post = crud_post.create_db_post(
-        session=session, 
-        post_in=post_in,
-        owner_id=current_user.id
-    )
+    saved_image = _acquire_featured_image(session, post_in.featured_image_url)
+    try:
+        post = crud_post.create_db_post(
+            session=session, 
+            post_in=post_in,
+            owner_id=current_user.id,
+            featured_image_variants=saved_image.variants if saved_image else None
+        )
+    except Exception:
+        if saved_image:
+            session.rollback()
+            release_upload(session, saved_image.path, saved_image.variants)
+        raise
     return post
 
-@router.get("/", response_model=Page[PostReadWithDetails])
+@router.get("/", response_model=Union[Page[PostReadWithDetails], Page[PostSummary]])
 def read_posts_endpoint(
     *,
     page: int = Query(1, ge=1, description="So trang, bat dau tu 1"),
     page_size: int = Query(20, ge=1, le=100, description="So luong item tren moi trang"),
+    after: Optional[str] = Query(None, description="Cursor lay tu next_cursor cua trang truoc; khi co, phan trang theo keyset va bo qua page"),
     search: Optional[str] = Query(None, description="Tu khoa tim kiem trong title or content of post"),
     tags: Optional[List[str]] = Query(None, description="Lọc bài viết theo danh sách tên tag (phân cách bằng nhiều tham số tags=tag1&tags=tag2)"),
+    sort: Literal["newest", "relevance"] = Query(crud_post.POST_SORT_NEWEST, description="Sap xep: newest (moi nhat) hoac relevance (do lien quan, chi co tac dung khi co search)"),
+    view: Literal["full", "summary"] = Query("full", description="full: PostReadWithDetails; summary: title, excerpt, tags, tac gia, so binh luan"),
+    request: Request,
+    response: Response,
     session: Session = Depends(deps.get_db)
 ):
-    posts_on_page, total_items = crud_post.get_db_posts(
-        session=session, page=page, page_size=page_size, search=search, filter_tags=tags
-    )
+    # Khong gui Last-Modified cho danh sach: ETag la phien ban danh sach (tang moi khi them/sua/xoa bai).
+    list_version = crud_post.get_db_post_list_version(session=session)
+    etag = http_cache.make_etag("posts", list_version)
+    if http_cache.is_not_modified(request, etag, None):
+        return http_cache.not_modified_response(etag, None)
+    http_cache.set_validators(response, etag, None)
+
+    page_model = Page[PostSummary] if view == "summary" else Page[PostReadWithDetails]
+
+    if after is not None:
+        if sort == crud_post.POST_SORT_RELEVANCE:
+            raise HTTPException(status_code=400, detail="Cursor pagination only supports sort=newest")
+        try:
+            if view == "summary":
+                posts_on_page, next_cursor = crud_post.get_db_post_summaries_after(
+                    session=session, page_size=page_size, after=after, search=search, filter_tags=tags
+                )
+            else:
+                posts_on_page, next_cursor = crud_post.get_db_posts_after(
+                    session=session, page_size=page_size, after=after, search=search, filter_tags=tags,
+                    options=crud_post.POST_LOAD_DETAILS
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return page_model(
+            items=posts_on_page,
+            page=1,
+            page_size=page_size,
+            has_next=next_cursor is not None,
+            # after rong (?after=) la trang dau cua che do cursor.
+            has_previous=bool(after),
+            search_query=search,
+            active_tags=tags,
+            sort=sort,
+            next_cursor=next_cursor
+        )
+
+    if view == "summary":
+        posts_on_page, total_items = crud_post.get_db_post_summaries(
+            session=session, page=page, page_size=page_size, search=search, filter_tags=tags, sort=sort
+        )
+    else:
+        posts_on_page, total_items = crud_post.get_db_posts(
+            session=session, page=page, page_size=page_size, search=search, filter_tags=tags, sort=sort,
+            options=crud_post.POST_LOAD_DETAILS
+        )
     
     if total_items == 0:
         total_pages = 0
@@ -46,7 +118,11 @@ def read_posts_endpoint(
     has_next = page < total_pages
     has_previous = page > 1
 
-    return Page[PostReadWithDetails](
+    next_cursor = None
+    if has_next and posts_on_page and sort == crud_post.POST_SORT_NEWEST:
+        next_cursor = crud_post.encode_post_cursor(posts_on_page[-1])
+
+    return page_model(
         items=posts_on_page,
         total_items=total_items,
         page=page,
@@ -55,7 +131,9 @@ def read_posts_endpoint(
         has_next=has_next,
         has_previous=has_previous,
         search_query=search,
-        active_tags=tags
+        active_tags=tags,
+        sort=sort,
+        next_cursor=next_cursor
     )
 
 @router.put("/{post_id}", response_model=post_models.PostRead)
@@ -71,7 +149,22 @@ def update_post_endpoint(
         raise HTTPException(status_code=404, detail=f"Post not found")
     if db_post.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permission")
-    update_post = crud_post.update_db_post(session=session, db_post=db_post, post_in=post_in)
+    old_image_url, old_image_variants = db_post.featured_image_url, db_post.featured_image_variants
+    image_changed = "featured_image_url" in post_in.model_fields_set and post_in.featured_image_url != old_image_url
+    saved_image = _acquire_featured_image(session, post_in.featured_image_url) if image_changed else None
+    # Gửi lại đúng URL đang dùng thì giữ tham chiếu và các biến thể hiện có.
+    new_image_variants = (saved_image.variants if saved_image else None) if image_changed else old_image_variants
+    try:
+        update_post = crud_post.update_db_post(
+            session=session, db_post=db_post, post_in=post_in, featured_image_variants=new_image_variants
+        )
+    except Exception:
+        if saved_image:
+            session.rollback()
+            release_upload(session, saved_image.path, saved_image.variants)
+        raise
+    if image_changed:
+        release_upload(session, old_image_url, old_image_variants)
     return update_post
 
 @router.delete("/{post_id}", status_code=200)
@@ -86,15 +179,28 @@ def delete_post_endpoint(
         raise HTTPException(status_code=404, detail="Post not found")
     if db_post.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permission")
+    featured_image_url, featured_image_variants = db_post.featured_image_url, db_post.featured_image_variants
     crud_post.delete_db_post(session=session, db_post=db_post)
+    release_upload(session, featured_image_url, featured_image_variants)
     return {"message": f"Post with id {post_id} has been deleted successfully"}
 
 @router.get("/{post_id}", response_model=PostReadWithDetails)
 def read_single_post_endpoint(
     post_id: int,
+    request: Request,
+    response: Response,
     session: Session = Depends(deps.get_db)
 ):
-    db_post = crud_post.get_db_post(session=session, post_id=post_id)
+    validators = crud_post.get_db_post_validators(session=session, post_id=post_id)
+    if validators is None:
+        raise HTTPException(status_code=404, detail=f"Post with id {post_id} not found")
+    updated_at, comment_count = validators
+    etag = http_cache.make_etag("post", post_id, updated_at, comment_count)
+    if http_cache.is_not_modified(request, etag, updated_at):
+        return http_cache.not_modified_response(etag, updated_at)
+
+    db_post = crud_post.get_db_post(session=session, post_id=post_id, options=crud_post.POST_LOAD_DETAILS)
     if not db_post:
         raise HTTPException(status_code=404, detail=f"Post with id {post_id} not found")
+    http_cache.set_validators(response, etag, updated_at)
     return db_post
\ No newline at end of file
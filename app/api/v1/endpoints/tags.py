@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
 from app.api import deps
 from app.crud import crud_tag
+from app.crud import aio
 from app.models.tag_models import TagCreate, TagRead, Tag
 from app.models.user_models import User
 
 router = APIRouter()
 
 @router.post("/", response_model=TagRead, status_code=status.HTTP_201_CREATED)
-async def create_new_tag(
+def create_new_tag(
     *,
     tag_in: TagCreate,
     session: Session = Depends(deps.get_db),
@@ -24,10 +26,10 @@ async def create_new_tag(
 @router.get("/", response_model=List[TagRead])
 async def list_all_tags(
     *,
-    session: Session = Depends(deps.get_db),
+    session: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100
 ):
 
-    tags = crud_tag.get_db_tags(session=session, skip=skip, limit=limit)
+    tags = await aio.crud_tag.get_db_tags(session=session, skip=skip, limit=limit)
     return tags
\ No newline at end of file
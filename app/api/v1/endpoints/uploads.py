@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.api import deps
+from app.core.storage import get_storage_backend
+from app.models.upload_models import PresignedUploadRequest, PresignedUploadRead
+from app.models.user_models import User
+from app.utils.file_upload import new_incoming_key
+
+router = APIRouter()
+
+# Cùng giới hạn với form tạo bài viết (router_pages.handle_create_post_form).
+DIRECT_UPLOAD_MAX_SIZE_MB = 2
+DIRECT_UPLOAD_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+@router.post("/presign", response_model=PresignedUploadRead)
+async def create_presigned_upload(
+    *,
+    upload_in: PresignedUploadRequest,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Cấp URL upload trực tiếp lên storage để file không đi qua app server.
+    Trả về 501 khi backend không hỗ trợ (STORAGE_BACKEND=local): client dùng form upload thường.
+    """
+    max_bytes = DIRECT_UPLOAD_MAX_SIZE_MB * 1024 * 1024
+    if upload_in.size_bytes > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File must be smaller than {DIRECT_UPLOAD_MAX_SIZE_MB}MB"
+        )
+    key = new_incoming_key(upload_in.filename)
+    if key is None or upload_in.content_type not in DIRECT_UPLOAD_CONTENT_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image type")
+
+    presigned = await run_in_threadpool(
+        get_storage_backend().presigned_upload, key, upload_in.content_type, max_bytes
+    )
+    if presigned is None:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Direct upload is not available")
+    return PresignedUploadRead(key=key, url=presigned["url"], fields=presigned["fields"])
@@ -3,13 +3,14 @@ from sqlmodel import Session
 from typing import List, Optional
 
 from app.api import deps
+from app.core import security
 from app.crud import crud_user
 from app.models.user_models import User, UserCreate, UserBase, UserRead
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED, name="register_new_user_api")
-async def register_new_user(
+def register_new_user(
     *,
     session: Session = Depends(deps.get_db),
     user_in: UserCreate
@@ -32,7 +33,8 @@ async def register_new_user(
             detail="Email already registered."
         )
     
-    user = crud_user.create_db_user(session=session, user_in=user_in)
+    hashed_password = security.get_password_hash_in_pool(user_in.password)
+    user = crud_user.create_db_user(session=session, user_in=user_in, hashed_password=hashed_password)
     return user
 
 @router.get("/me", response_model=UserRead)
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+
+class TTLCache:
+    """Cache LRU trong bộ nhớ tiến trình, mỗi entry hết hạn sau `ttl` giây.
+
+    An toàn khi dùng chung giữa các thread (threadpool của FastAPI và event loop).
+    Mỗi worker có cache riêng nên `ttl` là giới hạn trên cho độ trễ dữ liệu giữa các worker.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        # Không cập nhật thứ tự LRU, chỉ kiểm tra entry còn hạn.
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[0] > time.monotonic()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class TaggedTTLCache:
+    """TTLCache kèm index tag -> key: xóa mọi entry mang một tag mà không phải duyệt toàn bộ cache.
+
+    Dùng cho page cache và fragment cache (một bài viết đổi thì xóa mọi trang/fragment gắn tag của nó).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys_by_tag: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self._entries.get(key, default)
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), ttl: Optional[float] = None) -> None:
+        self._entries.set(key, value, ttl=ttl)
+        with self._lock:
+            for tag in tags:
+                keys = self._keys_by_tag.setdefault(tag, set())
+                keys.add(key)
+                # Bỏ các key đã bị LRU/TTL loại để index không phình ra giữa hai lần invalidate.
+                if len(keys) > 2 * self._entries.maxsize:
+                    keys.intersection_update(k for k in list(keys) if k in self._entries)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._keys_by_tag.pop(tag, set())
+        for key in keys:
+            self._entries.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys_by_tag.clear()
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
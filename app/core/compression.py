@@ -0,0 +1,204 @@
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Dependency tùy chọn: thiếu thì encoding tương ứng không được đề nghị.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Không nén: đã nén sẵn hoặc không có body / body là một phần file.
+SKIPPED_STATUS_CODES = {204, 206, 304}
+
+
+class _Compressor:
+    """Nén theo từng chunk; flush sau mỗi chunk để response streaming (NDJSON) vẫn tới client ngay."""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def flush(self) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+class _GzipCompressor(_Compressor):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: định dạng gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliCompressor(_Compressor):
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class _ZstdCompressor(_Compressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> Dict[str, Callable[[], _Compressor]]:
+    """Các encoding server hỗ trợ, theo thứ tự ưu tiên khi client chấp nhận ngang nhau."""
+    encodings: Dict[str, Callable[[], _Compressor]] = {}
+    if brotli is not None:
+        encodings["br"] = lambda: _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    if zstandard is not None:
+        encodings["zstd"] = lambda: _ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    encodings["gzip"] = lambda: _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+    return encodings
+
+def _parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        qualities[name] = quality
+    return qualities
+
+def negotiate_encoding(accept_encoding: str, supported: Iterable[str]) -> Optional[str]:
+    """Encoding có q cao nhất mà client chấp nhận (q=0 là từ chối); None nếu không có."""
+    qualities = _parse_accept_encoding(accept_encoding)
+    best: Optional[Tuple[float, int, str]] = None
+    for preference, encoding in enumerate(supported):
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or (quality, -preference) > best[:2]):
+            best = (quality, -preference, encoding)
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    """
+    Nén response (gzip, và brotli/zstd nếu đã cài) theo Accept-Encoding, chỉ cho các content-type
+    trong COMPRESSION_CONTENT_TYPES và body từ COMPRESSION_MIN_SIZE byte. Bỏ qua response đã có
+    Content-Encoding (file .br/.gz dựng sẵn, export .ndjson.gz) và ảnh. Hoạt động với
+    StreamingResponse: mỗi chunk được nén và flush ngay, không chờ hết body.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        content_types: Optional[Iterable[str]] = None
+    ) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.content_types = tuple(settings.COMPRESSION_CONTENT_TYPES if content_types is None else content_types)
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def should_compress(self, status_code: int, headers: Headers) -> bool:
+        if status_code < 200 or status_code in SKIPPED_STATUS_CODES:
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return content_type in self.content_types
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.initial_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Giữ lại header cho tới khi thấy chunk body đầu tiên (cần biết kích thước body).
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = not self.middleware.should_compress(message["status"], headers)
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._flush_initial_message()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                await self._flush_initial_message()
+                await self._send(message)
+                return
+            self._start_compression(streaming=more_body)
+            await self._flush_initial_message()
+
+        compressed = self.compressor.compress(body)
+        compressed += self.compressor.flush() if more_body else self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _start_compression(self, streaming: bool) -> None:
+        self.compressor = self.middleware.encodings[self.encoding]()
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # Độ dài sau nén chưa biết trước: bỏ Content-Length, server dùng chunked transfer encoding.
+        if "content-length" in headers:
+            del headers["content-length"]
+        # Byte khác đi nên ETag mạnh phải thành ETag yếu (ETag của trang đã là W/ sẵn).
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def _flush_initial_message(self) -> None:
+        if self.initial_message is not None:
+            message, self.initial_message = self.initial_message, None
+            if not self.passthrough and self.compressor is None:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            await self._send(message)
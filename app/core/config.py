@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import List, Optional
 import os
 import pathlib
 
@@ -10,9 +11,88 @@ class Settings(BaseSettings):
     SQLITE_DB_FILE: str = str(DATA_DIR / "blog.db")
     DATABASE_URL: str = f"sqlite:///{SQLITE_DB_FILE}"
     
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 20000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    
     SECRET_KEY: str = "ThisIsMySecretDemo@123213"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_INCLUDE_USER_ID: bool = True
+    
+    # Cache user theo từng worker: invalidate_cached_user chỉ xóa ở worker xử lý thay đổi, nên khi khóa
+    # hoặc đổi quyền một tài khoản, các worker khác còn dùng bản cũ tối đa USER_CACHE_TTL_SECONDS giây.
+    # Route admin (get_current_admin_user) luôn đọc lại user từ database nên không bị ảnh hưởng.
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+    
+    PAGE_CACHE_ENABLED: bool = True
+    PAGE_CACHE_TTL_SECONDS: int = 60
+    PAGE_CACHE_MAX_ENTRIES: int = 512
+    
+    # {% cache %} trong template (app/core/fragment_cache.py), dùng cho cả người đã đăng nhập.
+    FRAGMENT_CACHE_ENABLED: bool = True
+    FRAGMENT_CACHE_TTL_SECONDS: int = 300
+    FRAGMENT_CACHE_MAX_ENTRIES: int = 2048
+    FRAGMENT_CACHE_MAX_FRAGMENT_CHARS: int = 256 * 1024
+    
+    # Bytecode của template Jinja (app/core/templates.py); None: thư mục tạm của hệ thống.
+    TEMPLATE_BYTECODE_CACHE_ENABLED: bool = True
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None
+    TEMPLATE_WARMUP_ON_STARTUP: bool = True
+    
+    COUNT_CACHE_TTL_SECONDS: int = 30
+    COUNT_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Xóa user có nhiều hơn ngần này bài viết + bình luận sẽ chạy nền theo lô.
+    USER_DELETE_BACKGROUND_THRESHOLD: int = 5000
+    USER_DELETE_BATCH_SIZE: int = 1000
+    # Tiến độ job nền lưu ở bảng background_job. Job "running" không cập nhật quá JOB_STALE_SECONDS
+    # (worker đã dừng) được báo là thất bại và có thể chạy lại; job đã xong được giữ JOB_RETENTION_SECONDS.
+    JOB_STALE_SECONDS: int = 600
+    JOB_RETENTION_SECONDS: int = 24 * 60 * 60
+    
+    # "local": thư mục app/static/uploads; "s3": bucket S3/MinIO (cần boto3), dùng được với nhiều replica.
+    STORAGE_BACKEND: str = "local"
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PUBLIC_URL: Optional[str] = None
+    S3_PRESIGN_EXPIRES_SECONDS: int = 600
+    
+    # Tạo bản CSS/JS có hash trong tên (app/static/dist) khi khởi động; tắt nếu đã chạy
+    # scripts/build_static_assets.py lúc build image.
+    STATIC_ASSETS_BUILD_ON_STARTUP: bool = True
+    
+    # Nén response (app/core/compression.py); brotli/zstd chỉ dùng khi đã cài package tương ứng.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "text/html", "text/css", "text/plain", "text/javascript", "application/javascript",
+        "application/json", "application/x-ndjson", "application/xml", "text/xml", "image/svg+xml",
+    ]
+    
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    IMAGE_AVIF_ENABLED: bool = False
+    
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+    PASSWORD_HASH_USE_PROCESSES: bool = False
     
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,102 @@
+from typing import Any, Iterable, Optional
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from app.core.cache import TaggedTTLCache
+from app.core.config import settings
+
+
+# Tag gắn với fragment để CRUD xóa đúng phần bị ảnh hưởng (xem các hàm invalidate_* bên dưới).
+def post_fragments(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+class FragmentCacheBackend:
+    """Interface cho nơi lưu các đoạn HTML đã render bởi {% cache %}."""
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, fragment: str, ttl: Optional[float], tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryFragmentCacheBackend(FragmentCacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._fragments = TaggedTTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._fragments.get(key)
+
+    def set(self, key: str, fragment: str, ttl: Optional[float], tags: Iterable[str]) -> None:
+        self._fragments.set(key, fragment, tags=tags, ttl=ttl)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        self._fragments.invalidate_tags(*tags)
+
+    def clear(self) -> None:
+        self._fragments.clear()
+
+
+fragment_cache_backend: FragmentCacheBackend = InMemoryFragmentCacheBackend(
+    maxsize=settings.FRAGMENT_CACHE_MAX_ENTRIES, ttl=settings.FRAGMENT_CACHE_TTL_SECONDS
+)
+
+def set_fragment_cache_backend(backend: FragmentCacheBackend) -> None:
+    global fragment_cache_backend
+    fragment_cache_backend = backend
+
+
+def fragment_cache_key(template_name: Optional[str], request: Any, key: Any) -> str:
+    # Fragment chứa URL tuyệt đối (request.url_for) nên host cũng là một phần của key.
+    parts = key if isinstance(key, (list, tuple)) else (key,)
+    netloc = request.url.netloc if request is not None else ""
+    return "|".join([netloc, template_name or "", *(str(part) for part in parts)])
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache key, ttl, tags %}...{% endcache %}: render phần bên trong một lần rồi dùng lại.
+
+    `key` là chuỗi hoặc tuple, phải chứa mọi giá trị mà nội dung phụ thuộc vào (kể cả
+    current_user nếu có nút theo người xem). `ttl` (giây, mặc định FRAGMENT_CACHE_TTL_SECONDS)
+    và `tags` (ví dụ [post_fragments(post.id)]) là tùy chọn.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        for default in (nodes.Const(None), nodes.List([])):
+            args.append(parser.parse_expression() if parser.stream.skip_if("comma") else default)
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.ContextReference(), *args]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, context, key, ttl, tags, caller) -> str:
+        if not settings.FRAGMENT_CACHE_ENABLED:
+            return caller()
+        cache_key = fragment_cache_key(context.name, context.get("request"), key)
+        fragment = fragment_cache_backend.get(cache_key)
+        if fragment is None:
+            fragment = caller()
+            # Fragment quá lớn (ví dụ hàng nghìn bình luận) chiếm chỗ của nhiều fragment khác: không lưu.
+            if len(fragment) <= settings.FRAGMENT_CACHE_MAX_FRAGMENT_CHARS:
+                fragment_cache_backend.set(cache_key, fragment, ttl, tags)
+        return fragment
+
+
+def invalidate_post_fragments(*post_ids: int) -> None:
+    fragment_cache_backend.invalidate_tags(*(post_fragments(post_id) for post_id in post_ids))
+
+def invalidate_all_fragments() -> None:
+    fragment_cache_backend.clear()
@@ -0,0 +1,55 @@
+import datetime
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    # ETag yếu: cùng nội dung nhưng có thể khác byte (nén, thứ tự header) vẫn được coi là bằng nhau.
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # SQLite trả về datetime naive, được lưu theo UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc).replace(microsecond=0)
+
+def format_http_date(value: datetime.datetime) -> str:
+    return format_datetime(_as_utc(value), usegmt=True)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime.datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Theo RFC 9110, If-None-Match được ưu tiên và If-Modified-Since bị bỏ qua.
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified) <= _as_utc(since)
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime.datetime]) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_http_date(last_modified)
+
+def not_modified_response(etag: str, last_modified: Optional[datetime.datetime], headers: Optional[dict] = None) -> Response:
+    response = Response(status_code=304, headers=headers)
+    set_validators(response, etag, last_modified)
+    return response
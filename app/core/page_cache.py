@@ -0,0 +1,110 @@
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+from app.core.cache import TaggedTTLCache
+from app.core.config import settings
+from app.core import http_cache
+
+# Tag gắn với mỗi trang đã cache, dùng để xóa đúng các trang bị ảnh hưởng khi dữ liệu thay đổi.
+LISTING_PAGES = "listing"
+
+def post_pages(post_id: int) -> str:
+    return f"post:{post_id}"
+
+# Header được lưu cùng HTML để trả lại (và so khớp If-None-Match) khi HIT.
+CACHED_HEADERS = ("etag", "last-modified", "vary")
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+
+class PageCacheBackend:
+    """Interface cho nơi lưu HTML đã render (bộ nhớ tiến trình, Redis, ...)."""
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        raise NotImplementedError
+
+    def set(self, key: str, page: CachedPage, tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryPageCacheBackend(PageCacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._pages = TaggedTTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        return self._pages.get(key)
+
+    def set(self, key: str, page: CachedPage, tags: Iterable[str]) -> None:
+        self._pages.set(key, page, tags=tags)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        self._pages.invalidate_tags(*tags)
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+
+page_cache_backend: PageCacheBackend = InMemoryPageCacheBackend(
+    maxsize=settings.PAGE_CACHE_MAX_ENTRIES, ttl=settings.PAGE_CACHE_TTL_SECONDS
+)
+
+def set_page_cache_backend(backend: PageCacheBackend) -> None:
+    global page_cache_backend
+    page_cache_backend = backend
+
+
+def page_cache_key(request: Request) -> str:
+    # Bỏ tham số rỗng và sắp xếp để '?b=1&a=2' và '?a=2&b=1&c=' dùng chung một entry.
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+    query = urllib.parse.urlencode(params)
+    return f"{request.url.netloc}{request.url.path}?{query}"
+
+def is_page_cacheable(request: Request, current_user) -> bool:
+    # Trang của người đã đăng nhập và trang đang hiển thị flash message (base.html pop từ session)
+    # khác nhau theo từng người nên không được cache hay trả từ cache.
+    if not settings.PAGE_CACHE_ENABLED or current_user is not None:
+        return False
+    return not request.session.get("flash_messages")
+
+def get_cached_page(request: Request, current_user) -> Optional[Response]:
+    if not is_page_cacheable(request, current_user):
+        return None
+    page = page_cache_backend.get(page_cache_key(request))
+    if page is None:
+        return None
+    headers = {**page.headers, "X-Page-Cache": "HIT"}
+    etag = page.headers.get("etag")
+    last_modified = page.headers.get("last-modified")
+    if last_modified is not None:
+        last_modified = parsedate_to_datetime(last_modified)
+    if etag is not None and http_cache.is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=page.body, headers=headers)
+
+def store_page(request: Request, current_user, response: HTMLResponse, tags: Iterable[str]) -> HTMLResponse:
+    if response.status_code == 200 and is_page_cacheable(request, current_user):
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        page_cache_backend.set(page_cache_key(request), CachedPage(bytes(response.body), headers), tags)
+        response.headers["X-Page-Cache"] = "MISS"
+    return response
+
+
+def invalidate_post_pages(*post_ids: int) -> None:
+    # Mọi thay đổi của bài viết (kể cả số bình luận) đều hiện trên trang danh sách.
+    page_cache_backend.invalidate_tags(LISTING_PAGES, *(post_pages(post_id) for post_id in post_ids))
+
+def invalidate_all_pages() -> None:
+    page_cache_backend.clear()
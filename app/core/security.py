@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -17,6 +20,59 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(Exception):
+    """Hàng đợi hash/verify mật khẩu đã đầy; route handler nên trả về 503."""
+
+
+_password_executor: Optional[Executor] = None
+_password_jobs_pending = 0
+_password_jobs_lock = threading.Lock()
+
+def _get_password_executor() -> Executor:
+    global _password_executor
+    with _password_jobs_lock:
+        if _password_executor is None:
+            executor_class = ProcessPoolExecutor if settings.PASSWORD_HASH_USE_PROCESSES else ThreadPoolExecutor
+            _password_executor = executor_class(max_workers=settings.PASSWORD_HASH_WORKERS)
+        return _password_executor
+
+def _password_job_done(_future: Future) -> None:
+    global _password_jobs_pending
+    with _password_jobs_lock:
+        _password_jobs_pending -= 1
+
+def _submit_password_job(func, *args) -> Future:
+    # bcrypt tốn ~200ms CPU mỗi lần: chạy trong pool riêng để không chặn event loop/threadpool,
+    # và từ chối sớm khi số job đang chờ vượt quá giới hạn thay vì xếp hàng vô hạn.
+    global _password_jobs_pending
+    executor = _get_password_executor()
+    with _password_jobs_lock:
+        if _password_jobs_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT:
+            raise PasswordHasherBusy()
+        _password_jobs_pending += 1
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        _password_job_done(None)
+        raise
+    future.add_done_callback(_password_job_done)
+    return future
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(_submit_password_job(verify_password, plain_password, hashed_password))
+
+def get_password_hash_in_pool(password: str) -> str:
+    """Cho route handler `def` (đang chạy trong threadpool): chờ kết quả từ cùng pool có giới hạn."""
+    return _submit_password_job(get_password_hash, password).result()
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    with _password_jobs_lock:
+        if _password_executor is not None:
+            _password_executor.shutdown(wait=False)
+            _password_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -27,6 +83,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def access_token_claims(user) -> dict:
+    claims = {"sub": user.username}
+    if settings.ACCESS_TOKEN_INCLUDE_USER_ID:
+        # 'uid' giúp nhận ra token của tài khoản đã bị xóa rồi tạo lại với cùng username.
+        claims["uid"] = user.id
+    return claims
+
+def decode_access_token_payload(token: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
 def decode_access_token(token: str) -> Optional[str]:
     try:
         
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import pathlib
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import anyio
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.compression import negotiate_encoding
+from app.core.storage import IMMUTABLE_CACHE_CONTROL
+
+try:
+    import brotli
+except ImportError:  # Dependency tùy chọn: thiếu thì chỉ tạo bản .gz
+    brotli = None
+
+APP_DIR = pathlib.Path(__file__).resolve().parent.parent
+STATIC_DIR = APP_DIR / "static"
+# Thư mục nguồn (tương đối với static/) được fingerprint; uploads không nằm trong đây.
+ASSET_SOURCE_DIRS = ("css", "js")
+DIST_PREFIX = "dist"
+DIST_DIR = STATIC_DIR / DIST_PREFIX
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+# File upload có tên theo SHA-256 (xem app/utils/file_upload.py) nên cũng không bao giờ đổi nội dung.
+CONTENT_HASHED_PREFIXES = (f"{DIST_PREFIX}/", "uploads/images/")
+
+# Thứ tự ưu tiên khi trình duyệt chấp nhận nhiều encoding.
+PRECOMPRESSED_ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".map", ".txt"}
+
+
+def _write_atomic(path: pathlib.Path, data: bytes) -> None:
+    # Nhiều worker có thể build cùng lúc: ghi file tạm rồi đổi tên để không ai đọc phải file dở dang.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    with os.fdopen(temp_fd, "wb") as temp_file:
+        temp_file.write(data)
+    os.replace(temp_name, path)
+
+def _write_precompressed(path: pathlib.Path, data: bytes) -> None:
+    if path.suffix not in COMPRESSIBLE_SUFFIXES:
+        return
+    # mtime=0 để bản .gz giống hệt nhau giữa các lần build.
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gzipped) < len(data):
+        _write_atomic(path.with_name(path.name + ".gz"), gzipped)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            _write_atomic(path.with_name(path.name + ".br"), compressed)
+
+def build_static_assets() -> Dict[str, str]:
+    """
+    Chép mỗi file trong ASSET_SOURCE_DIRS thành `dist/<dir>/<tên>.<hash>.<ext>` kèm bản .gz/.br,
+    ghi manifest {"css/style.css": "dist/css/style.<hash>.css"} và xóa các bản build cũ.
+    Trả về manifest (đồng thời nạp nó cho asset_url).
+    """
+    manifest: Dict[str, str] = {}
+    for source_dir in ASSET_SOURCE_DIRS:
+        for source in sorted((STATIC_DIR / source_dir).rglob("*")):
+            if not source.is_file():
+                continue
+            data = source.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            relative = source.relative_to(STATIC_DIR)
+            fingerprinted = relative.with_name(f"{source.stem}.{digest}{source.suffix}")
+            target = DIST_DIR / fingerprinted
+            _write_atomic(target, data)
+            _write_precompressed(target, data)
+            manifest[relative.as_posix()] = f"{DIST_PREFIX}/{fingerprinted.as_posix()}"
+
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    keep = {STATIC_DIR / path for path in manifest.values()}
+    for built in list(DIST_DIR.rglob("*")):
+        if not built.is_file() or built.name == MANIFEST_PATH.name or built.name.endswith(".part"):
+            continue
+        original = built.with_suffix("") if built.suffix in (".gz", ".br") else built
+        if original not in keep:
+            built.unlink(missing_ok=True)
+    set_manifest(manifest)
+    return manifest
+
+
+_manifest: Optional[Dict[str, str]] = None
+_manifest_lock = threading.Lock()
+
+def get_manifest() -> Dict[str, str]:
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            try:
+                _manifest = json.loads(MANIFEST_PATH.read_text())
+            except (OSError, ValueError):
+                # Chưa build: asset_url trả về file gốc (không fingerprint), vẫn hoạt động bình thường.
+                _manifest = {}
+        return _manifest
+
+def set_manifest(manifest: Dict[str, str]) -> None:
+    global _manifest
+    with _manifest_lock:
+        _manifest = dict(manifest)
+
+@pass_context
+def asset_url(context, path: str) -> str:
+    """Jinja global: URL của CSS/JS có hash trong tên nếu đã build, ngược lại là file gốc."""
+    return str(context["request"].url_for("static", path=get_manifest().get(path, path)))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles phục vụ bản .br/.gz dựng sẵn theo Accept-Encoding (không nén lúc request),
+    và gắn Cache-Control immutable cho file có hash trong tên: trình duyệt không hỏi lại server.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        immutable = path.startswith(CONTENT_HASHED_PREFIXES)
+        compressible = immutable and pathlib.PurePath(path).suffix in COMPRESSIBLE_SUFFIXES
+        response = None
+        if compressible and scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if immutable and response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            if compressible:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        candidates = dict(PRECOMPRESSED_ENCODINGS)
+        # Thử lần lượt theo thứ tự client ưu tiên; bỏ qua encoding chưa có file dựng sẵn.
+        while candidates:
+            encoding = negotiate_encoding(accept_encoding, candidates)
+            if encoding is None:
+                return None
+            suffix = candidates.pop(encoding)
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not os.path.isfile(full_path):
+                continue
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                headers={"Content-Encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
@@ -0,0 +1,198 @@
+import mimetypes
+import os
+import pathlib
+import shutil
+import threading
+from typing import Optional
+
+from app.core.config import settings
+
+APP_DIR = pathlib.Path(__file__).resolve().parent.parent
+STATIC_DIR = APP_DIR / "static"
+
+# File upload có nội dung cố định theo hash (xem app/utils/file_upload.py) nên cache được vĩnh viễn.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def guess_content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class StorageBackend:
+    """
+    Nơi lưu file upload, định danh bằng key dạng đường dẫn ("uploads/images/ab/cd/<file>").
+    Các phương thức là sync (I/O chặn): caller async phải chạy chúng trong threadpool.
+    """
+
+    def save(self, local_path: pathlib.Path, key: str) -> None:
+        """Chuyển file cục bộ `local_path` vào storage với `key` (file cục bộ không còn sau đó)."""
+        raise NotImplementedError
+
+    def download(self, key: str, local_path: pathlib.Path) -> None:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        """Kích thước file (byte) mà không tải nội dung về."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        """{"url", "fields"} cho upload trực tiếp từ trình duyệt, hoặc None nếu backend không hỗ trợ."""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Lưu trong thư mục static của app (mặc định), phục vụ qua StaticFiles tại /static."""
+
+    def __init__(self, root_dir: pathlib.Path = STATIC_DIR, base_url: str = "/static"):
+        self.root_dir = root_dir
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> pathlib.Path:
+        path = (self.root_dir / key).resolve()
+        if not path.is_relative_to(self.root_dir.resolve()):
+            raise ValueError(f"Key nằm ngoài thư mục storage: {key}")
+        return path
+
+    def save(self, local_path: pathlib.Path, key: str) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(local_path, target)
+        except OSError:
+            # Khác filesystem (ví dụ /tmp và volume uploads): chép sang file tạm cạnh đích rồi đổi tên,
+            # để tên đích không bao giờ trỏ tới file dở dang.
+            partial = target.with_name(f".{target.name}.part")
+            shutil.copyfile(local_path, partial)
+            os.replace(partial, target)
+            os.unlink(local_path)
+
+    def download(self, key: str, local_path: pathlib.Path) -> None:
+        shutil.copyfile(self._path(key), local_path)
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def delete(self, key: str) -> bool:
+        path = self._path(key)
+        if not path.is_file():
+            return False
+        path.unlink()
+        return True
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Bucket S3 hoặc dịch vụ tương thích (MinIO, R2...) qua boto3 (dependency tùy chọn).
+    Nhiều replica của app dùng chung bucket nên không cần volume uploads dùng chung.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_url: Optional[str] = None,
+        presign_expires_seconds: int = 600
+    ):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 cần cài boto3 (pip install boto3).") from e
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        if public_url:
+            self.public_url = public_url.rstrip("/")
+        elif endpoint_url:
+            self.public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.amazonaws.com"
+        self.presign_expires_seconds = presign_expires_seconds
+
+    def save(self, local_path: pathlib.Path, key: str) -> None:
+        self.client.upload_file(
+            str(local_path), self.bucket, key,
+            ExtraArgs={"ContentType": guess_content_type(key), "CacheControl": IMMUTABLE_CACHE_CONTROL}
+        )
+        os.unlink(local_path)
+
+    def download(self, key: str, local_path: pathlib.Path) -> None:
+        self.client.download_file(self.bucket, key, str(local_path))
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+
+    def delete(self, key: str) -> bool:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        # Điều kiện ký kèm theo: đúng key, đúng Content-Type và kích thước tối đa, S3 tự từ chối nếu sai.
+        # Object trong uploads/incoming/ mà form không bao giờ gửi key lên sẽ nằm lại trong bucket:
+        # cần lifecycle rule xóa prefix này sau 1 ngày (xem README).
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=self.presign_expires_seconds,
+        )
+
+
+def create_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            public_url=settings.S3_PUBLIC_URL,
+            presign_expires_seconds=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        )
+    return LocalStorageBackend()
+
+
+_storage_backend: Optional[StorageBackend] = None
+_storage_backend_lock = threading.Lock()
+
+def get_storage_backend() -> StorageBackend:
+    # Tạo lúc dùng lần đầu để import app không cần boto3/credential khi dùng backend local.
+    global _storage_backend
+    with _storage_backend_lock:
+        if _storage_backend is None:
+            _storage_backend = create_storage_backend()
+        return _storage_backend
+
+def set_storage_backend(backend: StorageBackend) -> None:
+    global _storage_backend
+    with _storage_backend_lock:
+        _storage_backend = backend
+
+
+def media_url(path: Optional[str]) -> str:
+    """URL công khai của file upload (Jinja global); URL ngoài (http...) được giữ nguyên."""
+    if not path:
+        return ""
+    if path.startswith(("http://", "https://")):
+        return path
+    return get_storage_backend().url(path)
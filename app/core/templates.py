@@ -0,0 +1,64 @@
+import datetime
+import pathlib
+import time
+import urllib.parse
+from typing import Optional
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.core.config import settings
+from app.core.fragment_cache import FragmentCacheExtension, post_fragments
+from app.core.static_assets import asset_url
+from app.core.storage import media_url
+
+APP_DIR = pathlib.Path(__file__).resolve().parent.parent
+TEMPLATES_DIR = APP_DIR / "templates"
+
+
+def get_current_year():
+    return datetime.datetime.now(datetime.timezone.utc).year
+
+def create_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    # Bytecode đã biên dịch được lưu ra file: worker mới (cùng máy hoặc cùng image) chỉ cần nạp lại,
+    # không phải parse/compile template. Key gồm checksum nội dung nên sửa template không dùng nhầm bản cũ.
+    if not settings.TEMPLATE_BYTECODE_CACHE_ENABLED:
+        return None
+    if settings.TEMPLATE_BYTECODE_CACHE_DIR is None:
+        return FileSystemBytecodeCache()  # Thư mục tạm của hệ thống, dùng chung giữa các worker
+    directory = pathlib.Path(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(directory=str(directory))
+
+
+# Một Environment dùng chung cho router_pages và router_admin: template chỉ compile một lần mỗi worker.
+# Tạo sẵn Environment (autoescape như mặc định của Starlette) thay vì truyền tùy chọn qua Jinja2Templates (deprecated).
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    extensions=[FragmentCacheExtension],
+    bytecode_cache=create_bytecode_cache(),
+    autoescape=True,
+))
+templates.env.globals["settings"] = settings
+templates.env.globals["get_current_year"] = get_current_year
+templates.env.globals["media_url"] = media_url
+templates.env.globals["asset_url"] = asset_url
+templates.env.globals["post_fragments"] = post_fragments
+templates.env.filters['urlencode'] = urllib.parse.quote_plus
+
+
+def warm_templates() -> int:
+    """
+    Compile (hoặc nạp từ bytecode cache) mọi template vào cache của Environment, gọi lúc khởi động
+    để request đầu tiên sau deploy/scale không phải chờ compile. Trả về số template đã nạp.
+    """
+    started = time.perf_counter()
+    loaded = 0
+    for name in templates.env.list_templates(extensions=["html"]):
+        try:
+            templates.env.get_template(name)
+            loaded += 1
+        except Exception as e:
+            print(f"Error compiling template {name}: {e}")
+    print(f"Warmed {loaded} templates in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return loaded
@@ -0,0 +1 @@
+from . import crud_comment, crud_post, crud_tag, crud_user
@@ -0,0 +1,26 @@
+from typing import List, Optional, Sequence
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.comment_models import Comment
+
+
+async def get_db_comments_for_post(
+    session: AsyncSession, *,
+    post_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    options: Sequence = ()
+) -> List[Comment]:
+    statement = (
+        select(Comment)
+        .options(*options)
+        .where(Comment.post_id == post_id)
+        .order_by(Comment.created_at.desc())
+        .offset(skip).limit(limit)
+    )
+    comments = (await session.exec(statement)).all()
+    return comments
+
+async def get_db_comment(session: AsyncSession, *, comment_id: int) -> Optional[Comment]:
+    return await session.get(Comment, comment_id)
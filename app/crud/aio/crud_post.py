@@ -0,0 +1,131 @@
+import datetime
+from typing import Optional, List, Tuple, Sequence
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.post_models import Post, PostSummary
+from app.crud import crud_count
+from app.crud.crud_post import (
+    POST_SORT_NEWEST,
+    build_page_statement,
+    post_count_query,
+    build_page_after_statement,
+    split_next_cursor,
+    post_summary_statement,
+    post_tags_statement,
+    build_post_summaries,
+    post_validators_statement,
+    post_list_version_statement,
+)
+
+# Bản async của các hàm đọc trong app.crud.crud_post, dùng chung statement builder.
+# Loader option phải eager (POST_LOAD_LIST/POST_LOAD_DETAILS): lazy load không chạy được trong AsyncSession.
+
+
+async def get_db_post(session: AsyncSession, post_id: int, options: Sequence = ()) -> Optional[Post]:
+    return await session.get(Post, post_id, options=options)
+
+
+async def get_db_post_validators(session: AsyncSession, post_id: int) -> Optional[Tuple[datetime.datetime, int]]:
+    row = (await session.exec(post_validators_statement(post_id))).first()
+    return tuple(row) if row is not None else None
+
+
+async def get_db_post_list_version(session: AsyncSession) -> int:
+    return (await session.exec(post_list_version_statement())).one_or_none() or 0
+
+
+async def count_db_posts(
+    session: AsyncSession,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None
+) -> int:
+    count_statement, cache_key = post_count_query(session.bind.dialect.name, search, filter_tags, author_id)
+    total_items = crud_count.get_cached_count(cache_key) if cache_key is not None else None
+    if total_items is None:
+        total_items = (await session.exec(count_statement)).one_or_none() or 0
+        if cache_key is not None:
+            crud_count.set_cached_count(cache_key, total_items)
+    return total_items
+
+
+async def get_db_posts(
+    session: AsyncSession,
+    page: int,
+    page_size: int,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    sort: str = POST_SORT_NEWEST,
+    options: Sequence = ()
+) -> Tuple[List[Post], int]:
+    statement_items = build_page_statement(
+        session.bind.dialect.name, select(Post).options(*options),
+        page=page, page_size=page_size, search=search,
+        filter_tags=filter_tags, author_id=author_id, sort=sort
+    )
+    posts_on_page = (await session.exec(statement_items)).all()
+    total_items = await count_db_posts(session, search=search, filter_tags=filter_tags, author_id=author_id)
+
+    return posts_on_page, total_items
+
+
+async def get_db_posts_after(
+    session: AsyncSession,
+    page_size: int,
+    after: Optional[str] = None,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    options: Sequence = ()
+) -> Tuple[List[Post], Optional[str]]:
+    statement_items = build_page_after_statement(
+        session.bind.dialect.name, select(Post).options(*options),
+        page_size=page_size, after=after, search=search,
+        filter_tags=filter_tags, author_id=author_id
+    )
+    return split_next_cursor((await session.exec(statement_items)).all(), page_size)
+
+
+async def _rows_to_summaries(session: AsyncSession, rows) -> List[PostSummary]:
+    post_ids = [row.id for row in rows]
+    tag_rows = (await session.exec(post_tags_statement(post_ids))).all() if post_ids else []
+    return build_post_summaries(rows, tag_rows)
+
+
+async def get_db_post_summaries(
+    session: AsyncSession,
+    page: int,
+    page_size: int,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    sort: str = POST_SORT_NEWEST
+) -> Tuple[List[PostSummary], int]:
+    statement_items = build_page_statement(
+        session.bind.dialect.name, post_summary_statement(),
+        page=page, page_size=page_size, search=search,
+        filter_tags=filter_tags, author_id=author_id, sort=sort
+    )
+    rows = (await session.exec(statement_items)).all()
+    total_items = await count_db_posts(session, search=search, filter_tags=filter_tags, author_id=author_id)
+
+    return await _rows_to_summaries(session, rows), total_items
+
+
+async def get_db_post_summaries_after(
+    session: AsyncSession,
+    page_size: int,
+    after: Optional[str] = None,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None
+) -> Tuple[List[PostSummary], Optional[str]]:
+    statement_items = build_page_after_statement(
+        session.bind.dialect.name, post_summary_statement(),
+        page_size=page_size, after=after, search=search,
+        filter_tags=filter_tags, author_id=author_id
+    )
+    rows, next_cursor = split_next_cursor((await session.exec(statement_items)).all(), page_size)
+    return await _rows_to_summaries(session, rows), next_cursor
@@ -0,0 +1,18 @@
+from typing import List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.tag_models import Tag
+
+
+async def get_db_tag_by_id(session: AsyncSession, *, tag_id: int) -> Optional[Tag]:
+    return await session.get(Tag, tag_id)
+
+async def get_db_tags(
+    session: AsyncSession, *,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Tag]:
+    statement = select(Tag).offset(skip).limit(limit).order_by(Tag.name)
+    tags = (await session.exec(statement)).all()
+    return tags
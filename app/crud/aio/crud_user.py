@@ -0,0 +1,17 @@
+from typing import Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.user_models import User
+
+
+async def get_user_by_username(session: AsyncSession, username: str) -> Optional[User]:
+    statement = select(User).where(User.username == username)
+    return (await session.exec(statement)).first()
+
+async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
+    statement = select(User).where(User.email == email)
+    return (await session.exec(statement)).first()
+
+async def get_db_user_by_id(session: AsyncSession, user_id: int) -> Optional[User]:
+    return await session.get(User, user_id)
@@ -1,9 +1,28 @@
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Sequence
+from sqlalchemy import update, delete
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select, func, or_
 
 from app.models.comment_models import Comment, CommentCreate
-from app.models.post_models import Post
+from app.models.post_models import Post, utc_now
 from app.models.user_models import User
+from app.core import page_cache, fragment_cache
+from . import crud_count
+
+# Comment kèm tác giả (CommentReadWithAuthor, danh sách bình luận trong detail.html).
+COMMENT_LOAD_WITH_OWNER = (joinedload(Comment.owner),)
+# Danh sách bình luận trong admin: tác giả và tiêu đề bài viết (không tải content).
+COMMENT_LOAD_ADMIN = (joinedload(Comment.owner), joinedload(Comment.post).load_only(Post.id, Post.title))
+
+def change_post_comment_count(session: Session, post_id: int, delta: int) -> None:
+    # Cập nhật bằng biểu thức SQL (comment_count + delta) để hai request đồng thời không ghi đè nhau.
+    # Số bình luận là một phần nội dung của bài viết nên updated_at (ETag/Last-Modified) cũng đổi theo.
+    # Caller cộng crud_count.POSTS_VERSION trong cùng transaction.
+    session.exec(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(comment_count=Post.comment_count + delta, updated_at=utc_now())
+    )
 
 def create_db_comment(
     session: Session, *,
@@ -15,18 +34,24 @@ def create_db_comment(
     db_comment = Comment(**comment_data, post_id=post_id, owner_id=owner_id)
     
     session.add(db_comment)
+    change_post_comment_count(session, post_id, 1)
+    crud_count.change_counters(session, {crud_count.COMMENTS_TOTAL: 1, crud_count.POSTS_VERSION: 1})
     session.commit()
     session.refresh(db_comment)
+    page_cache.invalidate_post_pages(post_id)
+    fragment_cache.invalidate_post_fragments(post_id)
     return db_comment
 
 def get_db_comments_for_post(
     session: Session, *,
     post_id: int,
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    options: Sequence = ()
 ) -> List[Comment]:
     statement = (
         select(Comment)
+        .options(*options)
         .where(Comment.post_id == post_id)
         .order_by(Comment.created_at.desc())
         .offset(skip).limit(limit)
@@ -38,22 +63,32 @@ def get_db_comment(session: Session, *, comment_id: int) -> Optional[Comment]:
     return session.get(Comment, comment_id)
 
 def delete_db_comment(session: Session, *, db_comment: Comment) -> None:
+    post_id = db_comment.post_id
     session.delete(db_comment)
+    change_post_comment_count(session, post_id, -1)
+    crud_count.change_counters(session, {crud_count.COMMENTS_TOTAL: -1, crud_count.POSTS_VERSION: 1})
     session.commit()
+    page_cache.invalidate_post_pages(post_id)
+    fragment_cache.invalidate_post_fragments(post_id)
 
 
+def count_db_comments(session: Session) -> int:
+    return crud_count.get_counter(session, crud_count.COMMENTS_TOTAL)
+
 def admin_get_db_comments(
     session: Session, *,
     page: int,
     page_size: int,
     search_term: Optional[str] = None,
     author_id: Optional[int] = None,
-    post_id_filter: Optional[int] = None
+    post_id_filter: Optional[int] = None,
+    options: Sequence = ()
 ) -> Tuple[List[Comment], int]:
     offset = (page - 1) * page_size
     
-    statement_items = select(Comment)
+    statement_items = select(Comment).options(*options)
     count_statement = select(func.count(Comment.id)).select_from(Comment)
+    count_cache_key = ("comments", search_term, author_id, post_id_filter)
     
     conditions = []
     if search_term:
@@ -76,19 +111,40 @@ def admin_get_db_comments(
     statement_items = statement_items.order_by(Comment.created_at.desc()).offset(offset).limit(page_size)
     
     comments_on_page = session.exec(statement_items).all()
-    total_items = session.exec(count_statement).one_or_none() or 0
+    if not conditions:
+        total_items = crud_count.get_counter(session, crud_count.COMMENTS_TOTAL)
+    else:
+        total_items = crud_count.get_cached_count(count_cache_key)
+        if total_items is None:
+            total_items = crud_count.set_cached_count(count_cache_key, session.exec(count_statement).one_or_none() or 0)
     
     return comments_on_page, total_items
 
-def delete_db_comments_by_owner(session: Session, *, owner_id: int) -> int:
-    statement = select(Comment).where(Comment.owner_id == owner_id)
-    comments_to_delete = session.exec(statement).all()
-    
-    num_deleted = 0
-    if not comments_to_delete:
-        return num_deleted
-
-    for comment in comments_to_delete:
-        session.delete(comment)
-        num_deleted += 1
-    return num_deleted
\ No newline at end of file
+def delete_db_comments_by_owner(session: Session, *, owner_id: int, limit: Optional[int] = None) -> int:
+    """
+    Xóa bình luận của owner_id bằng câu DELETE, không tải từng Comment lên session.
+    limit: chỉ xóa tối đa `limit` bình luận (xóa theo lô trong job chạy nền). Caller commit.
+    """
+    condition = Comment.owner_id == owner_id
+    if limit is not None:
+        comment_ids = session.exec(select(Comment.id).where(condition).order_by(Comment.id).limit(limit)).all()
+        if not comment_ids:
+            return 0
+        condition = Comment.id.in_(comment_ids)
+
+    # Trừ comment_count của mọi bài viết liên quan trong một câu UPDATE với subquery đếm theo bài.
+    deleted_per_post = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id, condition)
+        .scalar_subquery()
+    )
+    session.exec(
+        update(Post)
+        .where(Post.id.in_(select(Comment.post_id).where(condition)))
+        .values(comment_count=Post.comment_count - deleted_per_post, updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    )
+
+    num_deleted = session.exec(delete(Comment).where(condition)).rowcount
+    crud_count.change_counters(session, {crud_count.COMMENTS_TOTAL: -num_deleted, crud_count.POSTS_VERSION: 1})
+    return num_deleted
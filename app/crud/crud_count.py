@@ -0,0 +1,82 @@
+from typing import Dict, Hashable, Optional
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlmodel import Session, select, delete
+
+from app.models.count_models import CountSummary
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Bộ đếm trong bảng count_summary, luôn chính xác vì được cập nhật cùng transaction ghi.
+# Key không có trong bảng được hiểu là 0 (migration đã khởi tạo mọi key cho dữ liệu cũ).
+POSTS_TOTAL = "posts"
+COMMENTS_TOTAL = "comments"
+USERS_TOTAL = "users"
+TAGS_TOTAL = "tags"
+# Phiên bản của danh sách bài viết: +1 trong cùng transaction với mọi thay đổi thêm/xóa bài hoặc đổi updated_at.
+# Dùng làm validator (ETag) cho các trang danh sách thay vì COUNT/max trên bảng post.
+POSTS_VERSION = "posts:version"
+
+def posts_by_tag_key(tag_name: str) -> str:
+    return f"posts:tag:{tag_name}"
+
+def posts_by_author_key(owner_id: int) -> str:
+    return f"posts:author:{owner_id}"
+
+# Số kết quả của các bộ lọc không có bộ đếm riêng (tìm kiếm, nhiều tag...), giữ trong TTL.
+filtered_count_cache = TTLCache(maxsize=settings.COUNT_CACHE_MAX_ENTRIES, ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+
+def counter_statement(key: str):
+    return select(CountSummary.value).where(CountSummary.key == key)
+
+def get_counter(session: Session, key: str) -> int:
+    return session.exec(counter_statement(key)).one_or_none() or 0
+
+def _increment_statement(dialect_name: str, deltas: Dict[str, int]):
+    """Một câu upsert nhiều dòng cho mọi key, hoặc None nếu dialect không hỗ trợ."""
+    rows = [{"key": key, "value": delta} for key, delta in deltas.items()]
+    if dialect_name in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+        statement = dialect_insert(CountSummary).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[CountSummary.key], set_={"value": CountSummary.value + statement.excluded.value}
+        )
+    if dialect_name in ("mysql", "mariadb"):
+        statement = mysql.insert(CountSummary).values(rows)
+        return statement.on_duplicate_key_update(value=CountSummary.value + statement.inserted.value)
+    return None
+
+def change_counters(session: Session, deltas: Dict[str, int]) -> None:
+    """Cộng `deltas` vào các bộ đếm trong transaction hiện tại; caller chịu trách nhiệm commit."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    statement = _increment_statement(session.get_bind().dialect.name, deltas)
+    if statement is not None:
+        session.exec(statement)
+    else:
+        for key, delta in deltas.items():
+            result = session.exec(
+                update(CountSummary).where(CountSummary.key == key).values(value=CountSummary.value + delta)
+            )
+            if result.rowcount == 0:
+                session.add(CountSummary(key=key, value=delta))
+    filtered_count_cache.clear()
+
+def rename_counter(session: Session, old_key: str, new_key: str) -> None:
+    session.exec(update(CountSummary).where(CountSummary.key == old_key).values(key=new_key))
+    filtered_count_cache.clear()
+
+def delete_counter(session: Session, key: str) -> None:
+    session.exec(delete(CountSummary).where(CountSummary.key == key))
+    filtered_count_cache.clear()
+
+
+def get_cached_count(cache_key: Hashable) -> Optional[int]:
+    return filtered_count_cache.get(cache_key)
+
+def set_cached_count(cache_key: Hashable, value: int) -> int:
+    filtered_count_cache.set(cache_key, value)
+    return value
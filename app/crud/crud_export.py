@@ -0,0 +1,104 @@
+import datetime
+from typing import Dict, Iterator, List, Optional
+from sqlmodel import Session, select
+
+from app.models.post_models import Post
+from app.models.comment_models import Comment
+from app.models.user_models import User
+from app.models.tag_models import Tag
+from app.models.link_models import PostTagLink
+
+EXPORT_KINDS = ("posts", "comments", "users")
+# Số dòng mỗi lần lấy từ cursor; bộ nhớ dùng cho export chỉ phụ thuộc vào giá trị này.
+EXPORT_BATCH_SIZE = 1000
+
+# Chỉ export các cột công khai; không bao giờ export hashed_password.
+USER_EXPORT_COLUMNS = (
+    User.id, User.username, User.email, User.full_name, User.is_active, User.is_admin,
+    User.profile_picture_url, User.bio, User.website_url, User.linkedin_url, User.github_url,
+)
+
+
+def _post_ids_with_tag(tag_name: str):
+    return (
+        select(PostTagLink.post_id)
+        .join(Tag, PostTagLink.tag_id == Tag.id)
+        .where(Tag.name == tag_name.lower().strip())
+    )
+
+def _created_at_range(column, created_from: Optional[datetime.date], created_to: Optional[datetime.date]):
+    conditions = []
+    if created_from is not None:
+        conditions.append(column >= datetime.datetime.combine(created_from, datetime.time.min, tzinfo=datetime.timezone.utc))
+    if created_to is not None:
+        # created_to tính cả ngày đó.
+        conditions.append(column < datetime.datetime.combine(created_to + datetime.timedelta(days=1), datetime.time.min, tzinfo=datetime.timezone.utc))
+    return conditions
+
+def export_statement(
+    kind: str, *,
+    created_from: Optional[datetime.date] = None,
+    created_to: Optional[datetime.date] = None,
+    author_id: Optional[int] = None,
+    tag: Optional[str] = None
+):
+    """
+    Statement chỉ chọn cột (không tạo ORM object) để session không giữ lại các dòng đã đọc.
+    Bộ lọc ngày/tag không áp dụng cho users; author_id lọc users theo id.
+    """
+    if kind == "posts":
+        statement = select(
+            Post.id, Post.title, Post.content, Post.featured_image_url, Post.created_at, Post.updated_at,
+            Post.owner_id, User.username.label("author"), Post.comment_count,
+        ).outerjoin(User, User.id == Post.owner_id)
+        statement = statement.where(*_created_at_range(Post.created_at, created_from, created_to))
+        if author_id is not None:
+            statement = statement.where(Post.owner_id == author_id)
+        if tag:
+            statement = statement.where(Post.id.in_(_post_ids_with_tag(tag)))
+        return statement.order_by(Post.id)
+
+    if kind == "comments":
+        statement = select(
+            Comment.id, Comment.post_id, Comment.owner_id, User.username.label("author"),
+            Comment.text, Comment.created_at,
+        ).outerjoin(User, User.id == Comment.owner_id)
+        statement = statement.where(*_created_at_range(Comment.created_at, created_from, created_to))
+        if author_id is not None:
+            statement = statement.where(Comment.owner_id == author_id)
+        if tag:
+            statement = statement.where(Comment.post_id.in_(_post_ids_with_tag(tag)))
+        return statement.order_by(Comment.id)
+
+    if kind == "users":
+        statement = select(*USER_EXPORT_COLUMNS)
+        if author_id is not None:
+            statement = statement.where(User.id == author_id)
+        return statement.order_by(User.id)
+
+    raise ValueError(f"Loại export không hợp lệ: {kind}")
+
+
+def _tags_for_posts(session: Session, post_ids: List[int]) -> Dict[int, List[str]]:
+    tags_by_post: Dict[int, List[str]] = {post_id: [] for post_id in post_ids}
+    statement = (
+        select(PostTagLink.post_id, Tag.name)
+        .join(Tag, PostTagLink.tag_id == Tag.id)
+        .where(PostTagLink.post_id.in_(post_ids))
+        .order_by(Tag.name)
+    )
+    for post_id, tag_name in session.exec(statement).all():
+        tags_by_post[post_id].append(tag_name)
+    return tags_by_post
+
+def iter_export_records(session: Session, kind: str, **filters) -> Iterator[dict]:
+    """Sinh từng record dạng dict, đọc qua server-side cursor theo lô EXPORT_BATCH_SIZE dòng."""
+    statement = export_statement(kind, **filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = session.exec(statement)
+    for rows in result.partitions():
+        records = [row._asdict() for row in rows]
+        if kind == "posts":
+            tags_by_post = _tags_for_posts(session, [record["id"] for record in records])
+            for record in records:
+                record["tags"] = tags_by_post[record["id"]]
+        yield from records
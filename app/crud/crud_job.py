@@ -0,0 +1,85 @@
+import datetime
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete
+
+from app.models.job_models import BackgroundJob
+from app.models.post_models import utc_now
+from app.core.config import settings
+
+JOB_INTERRUPTED_ERROR = "Tác vụ bị gián đoạn (worker đã dừng hoặc khởi động lại)"
+
+
+def _expire_stale_jobs(session: Session) -> None:
+    # Job chạy bằng BackgroundTasks trong worker đã nhận request: worker chết thì job dừng theo
+    # mà không kịp ghi trạng thái, nên job không cập nhật tiến độ quá lâu được coi là thất bại.
+    cutoff = utc_now() - datetime.timedelta(seconds=settings.JOB_STALE_SECONDS)
+    session.exec(
+        update(BackgroundJob)
+        .where(BackgroundJob.status == BackgroundJob.RUNNING, BackgroundJob.updated_at < cutoff)
+        .values(status=BackgroundJob.FAILED, error=JOB_INTERRUPTED_ERROR, finished_at=utc_now())
+    )
+
+def get_job(session: Session, *, job_id: str) -> Optional[BackgroundJob]:
+    _expire_stale_jobs(session)
+    session.commit()
+    return session.get(BackgroundJob, job_id)
+
+def start_job(session: Session, *, job_id: str, description: str, total: int) -> Optional[BackgroundJob]:
+    """Đăng ký job mới (hoặc chạy lại job cũ cùng id); trả về None nếu job cùng id vẫn đang chạy."""
+    _expire_stale_jobs(session)
+    retention_cutoff = utc_now() - datetime.timedelta(seconds=settings.JOB_RETENTION_SECONDS)
+    session.exec(delete(BackgroundJob).where(BackgroundJob.finished_at < retention_cutoff))
+
+    db_job = session.get(BackgroundJob, job_id)
+    if db_job is not None and db_job.is_running:
+        session.commit()
+        return None
+    if db_job is None:
+        db_job = BackgroundJob(id=job_id, description=description, total=total)
+    else:
+        now = utc_now()
+        db_job.description = description
+        db_job.total = total
+        db_job.done = 0
+        db_job.status = BackgroundJob.RUNNING
+        db_job.error = None
+        db_job.started_at = now
+        db_job.updated_at = now
+        db_job.finished_at = None
+    session.add(db_job)
+    try:
+        session.commit()
+    except IntegrityError:
+        # Request khác (có thể ở worker khác) vừa tạo job cùng id.
+        session.rollback()
+        return None
+    session.refresh(db_job)
+    return db_job
+
+def advance_job(session: Session, *, job_id: str, amount: int) -> None:
+    """Cộng tiến độ trong transaction hiện tại để tiến độ khớp với các lô đã commit; caller commit."""
+    session.exec(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(done=BackgroundJob.done + amount, updated_at=utc_now())
+    )
+
+def finish_job(session: Session, *, job_id: str) -> None:
+    now = utc_now()
+    session.exec(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(status=BackgroundJob.DONE, updated_at=now, finished_at=now)
+    )
+    session.commit()
+
+def fail_job(session: Session, *, job_id: str, error: str) -> None:
+    now = utc_now()
+    session.exec(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(status=BackgroundJob.FAILED, error=error, updated_at=now, finished_at=now)
+    )
+    session.commit()
@@ -1,147 +1,614 @@
-from sqlmodel import Session, select, func, or_, distinct
-from typing import Optional, List, Tuple
+import re
+import json
+import base64
+import datetime
+from collections import Counter
+from sqlalchemy import table, column, literal_column, update, insert, delete
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Session, select, func, or_, and_
+from typing import Any, Optional, List, Tuple, Sequence, Hashable
 
-from app.models.post_models import Post, PostCreate, PostUpdate, PostUpdateByAdmin
-from app.models.tag_models import Tag, TagCreate
+from app.models.post_models import Post, PostCreate, PostUpdate, PostUpdateByAdmin, PostSummary, utc_now
+from app.models.tag_models import Tag
 from app.models.link_models import PostTagLink
-from . import crud_tag
+from app.models.comment_models import Comment
+from app.models.user_models import User
+from app.core import page_cache, fragment_cache
+from . import crud_tag, crud_count
 
 def create_db_post(
     session: Session, *,
     post_in: PostCreate,
-    owner_id: int
+    owner_id: int,
+    featured_image_variants: Optional[dict] = None
 ) -> Post:
+    """featured_image_variants: chỉ truyền SavedImage.variants của ảnh vừa xử lý trên server."""
     post_data = post_in.model_dump(exclude={"tags"})
-    db_post = Post(**post_data, owner_id=owner_id)
+    db_post = Post(**post_data, owner_id=owner_id, featured_image_variants=featured_image_variants)
 
     if post_in.tags:
-        db_post.tags.clear()
-        for tag_name in post_in.tags:
-            if tag_name.strip():
-                tag_obj = crud_tag.create_db_tag(session=session, tag_in=TagCreate(name=tag_name))
-                if tag_obj not in db_post.tags:
-                    db_post.tags.append(tag_obj)
+        db_post.tags = crud_tag.get_or_create_tags(session, post_in.tags)
     
+    db_post.tag_count = len(db_post.tags)
     session.add(db_post)
+    deltas = {crud_count.POSTS_TOTAL: 1, crud_count.POSTS_VERSION: 1}
+    if owner_id is not None:
+        deltas[crud_count.posts_by_author_key(owner_id)] = 1
+    for tag_obj in db_post.tags:
+        deltas[crud_count.posts_by_tag_key(tag_obj.name)] = 1
+    crud_count.change_counters(session, deltas)
     session.commit()
     session.refresh(db_post)
+    page_cache.invalidate_post_pages()
     return db_post
 
-def get_db_post(session: Session, post_id: int) -> Optional[Post]:
-    return session.get(Post, post_id)
+def bulk_create_db_posts(session: Session, posts: List[dict]) -> List[int]:
+    """
+    Thêm nhiều bài viết kèm tag và bình luận bằng executemany (dùng cho import), không commit.
+    Mỗi phần tử gồm các cột của Post (title, content, featured_image_url, created_at, owner_id),
+    'tags': danh sách tên tag và 'comments': danh sách dict(text, owner_id, created_at).
+    Trả về id của các bài viết theo đúng thứ tự đầu vào.
+    """
+    if not posts:
+        return []
 
-def get_db_posts(
-    session: Session,
-    page: int,
-    page_size: int,
+    all_tag_names = [name for post in posts for name in post.get("tags") or []]
+    tag_ids_by_name = {tag.name: tag.id for tag in crud_tag.get_or_create_tags(session, all_tag_names)}
+
+    now = utc_now()
+    post_rows = []
+    post_tag_names = []
+    for post in posts:
+        tag_names = crud_tag.normalize_tag_names(post.get("tags") or [])
+        post_tag_names.append(tag_names)
+        created_at = post.get("created_at") or now
+        post_rows.append({
+            "title": post["title"],
+            "content": post["content"],
+            "featured_image_url": post.get("featured_image_url"),
+            "created_at": created_at,
+            "updated_at": created_at,
+            "owner_id": post.get("owner_id"),
+            "comment_count": len(post.get("comments") or []),
+            "tag_count": len(tag_names),
+        })
+    post_ids = session.exec(
+        insert(Post).returning(Post.id, sort_by_parameter_order=True), params=post_rows
+    ).scalars().all()
+
+    link_rows = []
+    comment_rows = []
+    for post_id, post, tag_names in zip(post_ids, posts, post_tag_names):
+        link_rows.extend({"post_id": post_id, "tag_id": tag_ids_by_name[name]} for name in tag_names)
+        comment_rows.extend(
+            {
+                "post_id": post_id,
+                "owner_id": comment["owner_id"],
+                "text": comment["text"],
+                "created_at": comment.get("created_at") or now,
+            }
+            for comment in post.get("comments") or []
+        )
+    if link_rows:
+        session.exec(insert(PostTagLink), params=link_rows)
+    if comment_rows:
+        session.exec(insert(Comment), params=comment_rows)
+
+    deltas = Counter({
+        crud_count.POSTS_TOTAL: len(post_rows),
+        crud_count.COMMENTS_TOTAL: len(comment_rows),
+        crud_count.POSTS_VERSION: 1,
+    })
+    deltas.update(crud_count.posts_by_author_key(row["owner_id"]) for row in post_rows if row["owner_id"] is not None)
+    deltas.update(crud_count.posts_by_tag_key(name) for tag_names in post_tag_names for name in tag_names)
+    crud_count.change_counters(session, dict(deltas))
+    return post_ids
+
+def get_db_post(session: Session, post_id: int, options: Sequence = ()) -> Optional[Post]:
+    return session.get(Post, post_id, options=options)
+
+# Validator cho HTTP conditional GET: đọc vài cột thay vì tải và render cả bài viết.
+def post_validators_statement(post_id: int):
+    return select(Post.updated_at, Post.comment_count).where(Post.id == post_id)
+
+def post_list_version_statement():
+    return crud_count.counter_statement(crud_count.POSTS_VERSION)
+
+def get_db_post_validators(session: Session, post_id: int) -> Optional[Tuple[datetime.datetime, int]]:
+    row = session.exec(post_validators_statement(post_id)).first()
+    return tuple(row) if row is not None else None
+
+def get_db_post_list_version(session: Session) -> int:
+    return crud_count.get_counter(session, crud_count.POSTS_VERSION)
+
+POST_SORT_NEWEST = "newest"
+POST_SORT_RELEVANCE = "relevance"
+
+POST_EXCERPT_LENGTH = 200
+
+# Các bộ loader option dùng chung cho từng call site, tránh lazy load N+1 khi render/serialize.
+# Danh sách bài viết (HTML): chỉ cần owner và tags.
+POST_LOAD_LIST = (joinedload(Post.owner), selectinload(Post.tags))
+# PostReadWithDetails (API): thêm toàn bộ comments.
+POST_LOAD_DETAILS = POST_LOAD_LIST + (selectinload(Post.comments),)
+
+post_fts = table("post_fts", column("rowid"), column("title"), column("content"))
+
+
+def _build_fts_query(search: str) -> Optional[str]:
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def apply_post_filters(
+    dialect_name: str,
+    statement,
+    *,
     search: Optional[str] = None,
     filter_tags: Optional[List[str]] = None,
     author_id: Optional[int] = None
-) -> Tuple[List[Post], int]:
-    offset = (page - 1) * page_size
-    
-    statement_items = select(Post)
-    count_statement = select(func.count(Post.id)).select_from(Post)
-    
-    conditions = []
+):
+    """
+    Gắn các điều kiện lọc bài viết vào statement.
+    Trả về (statement, biểu thức rank BM25 hoặc None nếu không tìm kiếm qua FTS).
+    """
+    rank = None
     if search:
-        search_term = f"%{search.lower()}%"
-        conditions.append(or_(
-            Post.title.ilike(search_term),
-            Post.content.ilike(search_term)
-        ))
-    
+        fts_query = _build_fts_query(search) if dialect_name == "sqlite" else None
+        if fts_query:
+            statement = (
+                statement
+                .join(post_fts, post_fts.c.rowid == Post.id)
+                .where(literal_column("post_fts").op("MATCH")(fts_query))
+            )
+            # Trọng số: khớp ở title quan trọng hơn khớp ở content. bm25 càng nhỏ càng liên quan.
+            rank = func.bm25(literal_column("post_fts"), 10.0, 1.0)
+        else:
+            search_term = f"%{search.lower()}%"
+            statement = statement.where(or_(
+                Post.title.ilike(search_term),
+                Post.content.ilike(search_term)
+            ))
+
     if author_id is not None:
-        conditions.append(Post.owner_id == author_id)
-
-    if conditions:
-        for condition in conditions:
-            statement_items = statement_items.where(condition)
-            count_statement = count_statement.where(condition)
-            
-    if filter_tags and len(filter_tags) > 0:
+        statement = statement.where(Post.owner_id == author_id)
+
+    if filter_tags:
         normalized_filter_tags = [tag.lower().strip() for tag in filter_tags if tag.strip()]
         if normalized_filter_tags:
-            tag_filter_condition = Tag.name.in_(normalized_filter_tags)
-            
-            statement_items = (
-                statement_items.distinct()
-                .join(PostTagLink, Post.id == PostTagLink.post_id)
+            tagged_post_ids = (
+                select(PostTagLink.post_id)
                 .join(Tag, PostTagLink.tag_id == Tag.id)
-                .where(tag_filter_condition)
+                .where(Tag.name.in_(normalized_filter_tags))
             )
+            statement = statement.where(Post.id.in_(tagged_post_ids))
 
-            subquery_for_count = (
-                select(distinct(Post.id))
-                .join(PostTagLink, Post.id == PostTagLink.post_id)
-                .join(Tag, PostTagLink.tag_id == Tag.id)
-                .where(tag_filter_condition)
-            )
-            if conditions:
-                for condition in conditions:
-                    subquery_for_count = subquery_for_count.where(condition)
-            
-            count_statement = select(func.count()).select_from(subquery_for_count.alias("subquery_for_count"))
+    return statement, rank
 
 
-    statement_items = statement_items.order_by(Post.created_at.desc()).offset(offset).limit(page_size)
-    
+def build_page_statement(
+    dialect_name: str,
+    statement_items,
+    *,
+    page: int,
+    page_size: int,
+    search: Optional[str],
+    filter_tags: Optional[List[str]],
+    author_id: Optional[int],
+    sort: str
+):
+    """Statement lấy các item của trang (OFFSET/LIMIT). Tổng số item lấy qua count_db_posts."""
+    offset = (page - 1) * page_size
+
+    statement_items, rank = apply_post_filters(
+        dialect_name, statement_items, search=search, filter_tags=filter_tags, author_id=author_id
+    )
+
+    if sort == POST_SORT_RELEVANCE and rank is not None:
+        statement_items = statement_items.order_by(rank, Post.created_at.desc(), Post.id.desc())
+    else:
+        statement_items = statement_items.order_by(Post.created_at.desc(), Post.id.desc())
+    statement_items = statement_items.offset(offset).limit(page_size)
+
+    return statement_items
+
+
+def build_count_statement(
+    dialect_name: str,
+    *,
+    search: Optional[str],
+    filter_tags: Optional[List[str]],
+    author_id: Optional[int]
+):
+    count_statement, _ = apply_post_filters(
+        dialect_name, select(func.count(Post.id)).select_from(Post),
+        search=search, filter_tags=filter_tags, author_id=author_id
+    )
+    return count_statement
+
+
+def post_count_keys(
+    search: Optional[str],
+    filter_tags: Optional[List[str]],
+    author_id: Optional[int]
+) -> Tuple[Optional[str], Hashable]:
+    """
+    Trả về (key bộ đếm trong count_summary nếu bộ lọc có bộ đếm chính xác, key trong filtered_count_cache).
+    Chỉ trang không lọc, lọc theo đúng một tag hoặc chỉ theo tác giả mới có bộ đếm riêng.
+    """
+    tags = sorted({tag.lower().strip() for tag in filter_tags or [] if tag.strip()})
+    if not search:
+        if not tags and author_id is None:
+            return crud_count.POSTS_TOTAL, None
+        if len(tags) == 1 and author_id is None:
+            return crud_count.posts_by_tag_key(tags[0]), None
+        if not tags:
+            return crud_count.posts_by_author_key(author_id), None
+    return None, ("posts", search, tuple(tags), author_id)
+
+
+def post_count_query(
+    dialect_name: str,
+    search: Optional[str],
+    filter_tags: Optional[List[str]],
+    author_id: Optional[int]
+) -> Tuple[Any, Optional[Hashable]]:
+    """
+    (statement trả về tổng số bài, key trong filtered_count_cache hoặc None).
+    Bộ lọc có bộ đếm riêng đọc thẳng count_summary; các bộ lọc khác phải COUNT nên kết quả được cache.
+    """
+    counter_key, cache_key = post_count_keys(search, filter_tags, author_id)
+    if counter_key is not None:
+        return crud_count.counter_statement(counter_key), None
+    return build_count_statement(dialect_name, search=search, filter_tags=filter_tags, author_id=author_id), cache_key
+
+
+def count_db_posts(
+    session: Session,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None
+) -> int:
+    count_statement, cache_key = post_count_query(session.get_bind().dialect.name, search, filter_tags, author_id)
+    total_items = crud_count.get_cached_count(cache_key) if cache_key is not None else None
+    if total_items is None:
+        total_items = session.exec(count_statement).one_or_none() or 0
+        if cache_key is not None:
+            crud_count.set_cached_count(cache_key, total_items)
+    return total_items
+
+
+def build_page_after_statement(
+    dialect_name: str,
+    statement_items,
+    *,
+    page_size: int,
+    after: Optional[str],
+    search: Optional[str],
+    filter_tags: Optional[List[str]],
+    author_id: Optional[int]
+):
+    """Statement keyset lấy page_size + 1 item để biết còn trang kế tiếp hay không."""
+    statement_items, _ = apply_post_filters(
+        dialect_name, statement_items, search=search, filter_tags=filter_tags, author_id=author_id
+    )
+
+    if after:
+        after_created_at, after_id = decode_post_cursor(after)
+        statement_items = statement_items.where(or_(
+            Post.created_at < after_created_at,
+            and_(Post.created_at == after_created_at, Post.id < after_id)
+        ))
+
+    return (
+        statement_items
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(page_size + 1)
+    )
+
+
+def split_next_cursor(items: list, page_size: int) -> Tuple[list, Optional[str]]:
+    if len(items) > page_size:
+        items = items[:page_size]
+        return items, encode_post_cursor(items[-1])
+    return items, None
+
+
+def get_db_posts(
+    session: Session,
+    page: int,
+    page_size: int,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    sort: str = POST_SORT_NEWEST,
+    options: Sequence = ()
+) -> Tuple[List[Post], int]:
+    statement_items = build_page_statement(
+        session.get_bind().dialect.name, select(Post).options(*options),
+        page=page, page_size=page_size, search=search,
+        filter_tags=filter_tags, author_id=author_id, sort=sort
+    )
     posts_on_page = session.exec(statement_items).all()
-    total_items = session.exec(count_statement).one_or_none() or 0
-    
+    total_items = count_db_posts(session, search=search, filter_tags=filter_tags, author_id=author_id)
+
     return posts_on_page, total_items
 
 
+def encode_post_cursor(post: Post) -> str:
+    raw = json.dumps([post.created_at.isoformat(), post.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_post_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Giải mã cursor do encode_post_cursor tạo ra. Raise ValueError nếu cursor không hợp lệ."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at_str, post_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.datetime.fromisoformat(created_at_str), int(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor không hợp lệ") from e
+
+
+def get_db_posts_after(
+    session: Session,
+    page_size: int,
+    after: Optional[str] = None,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    options: Sequence = ()
+) -> Tuple[List[Post], Optional[str]]:
+    """
+    Phân trang theo keyset (created_at, id) thay cho OFFSET: chi phí mỗi trang không phụ thuộc
+    vào độ sâu. Trả về (danh sách bài viết, cursor của trang kế tiếp hoặc None nếu hết).
+    """
+    statement_items = build_page_after_statement(
+        session.get_bind().dialect.name, select(Post).options(*options),
+        page_size=page_size, after=after, search=search,
+        filter_tags=filter_tags, author_id=author_id
+    )
+    return split_next_cursor(session.exec(statement_items).all(), page_size)
+
+
+def post_summary_statement():
+    return (
+        select(
+            Post.id,
+            Post.title,
+            func.substr(Post.content, 1, POST_EXCERPT_LENGTH).label("excerpt"),
+            Post.featured_image_url,
+            Post.featured_image_variants,
+            Post.created_at,
+            Post.owner_id,
+            User.username.label("author_name"),
+            Post.comment_count,
+        )
+        .select_from(Post)
+        .outerjoin(User, User.id == Post.owner_id)
+    )
+
+
+def post_tags_statement(post_ids: List[int]):
+    return (
+        select(PostTagLink.post_id, Tag)
+        .join(Tag, PostTagLink.tag_id == Tag.id)
+        .where(PostTagLink.post_id.in_(post_ids))
+        .order_by(Tag.name)
+    )
+
+
+def build_post_summaries(rows, tag_rows) -> List[PostSummary]:
+    tags_by_post: dict = {row.id: [] for row in rows}
+    for post_id, tag in tag_rows:
+        tags_by_post[post_id].append(tag)
+
+    return [
+        PostSummary(**row._mapping, tags=tags_by_post[row.id])
+        for row in rows
+    ]
+
+
+def _rows_to_summaries(session: Session, rows) -> List[PostSummary]:
+    post_ids = [row.id for row in rows]
+    tag_rows = session.exec(post_tags_statement(post_ids)).all() if post_ids else []
+    return build_post_summaries(rows, tag_rows)
+
+
+def get_db_post_summaries(
+    session: Session,
+    page: int,
+    page_size: int,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None,
+    sort: str = POST_SORT_NEWEST
+) -> Tuple[List[PostSummary], int]:
+    """
+    Giống get_db_posts nhưng chỉ lấy các cột cần cho trang danh sách: excerpt được cắt
+    bằng substr và số bình luận được đếm trong SQL, không tải content hay comments.
+    """
+    statement_items = build_page_statement(
+        session.get_bind().dialect.name, post_summary_statement(),
+        page=page, page_size=page_size, search=search,
+        filter_tags=filter_tags, author_id=author_id, sort=sort
+    )
+    rows = session.exec(statement_items).all()
+    total_items = count_db_posts(session, search=search, filter_tags=filter_tags, author_id=author_id)
+
+    return _rows_to_summaries(session, rows), total_items
+
+
+def get_db_post_summaries_after(
+    session: Session,
+    page_size: int,
+    after: Optional[str] = None,
+    search: Optional[str] = None,
+    filter_tags: Optional[List[str]] = None,
+    author_id: Optional[int] = None
+) -> Tuple[List[PostSummary], Optional[str]]:
+    statement_items = build_page_after_statement(
+        session.get_bind().dialect.name, post_summary_statement(),
+        page_size=page_size, after=after, search=search,
+        filter_tags=filter_tags, author_id=author_id
+    )
+    rows, next_cursor = split_next_cursor(session.exec(statement_items).all(), page_size)
+    return _rows_to_summaries(session, rows), next_cursor
+
+
+def _set_image_variants(db_post: Post, update_data: dict, featured_image_variants: Optional[dict]) -> None:
+    # Biến thể đi theo featured_image_url: đổi URL mà không có ảnh mới xử lý trên server thì bỏ biến thể cũ.
+    if "featured_image_url" in update_data:
+        db_post.featured_image_variants = featured_image_variants
+
 def update_db_post(
-    session: Session, *, db_post: Post, post_in: PostUpdate
+    session: Session, *, db_post: Post, post_in: PostUpdate, featured_image_variants: Optional[dict] = None
 ) -> Post:
     update_data = post_in.model_dump(exclude_unset=True)
+    _set_image_variants(db_post, update_data, featured_image_variants)
     for key, value in update_data.items():
         setattr(db_post, key, value)
+    db_post.updated_at = utc_now()
     session.add(db_post)
+    crud_count.change_counters(session, {crud_count.POSTS_VERSION: 1})
     session.commit()
     session.refresh(db_post)
+    page_cache.invalidate_post_pages(db_post.id)
+    fragment_cache.invalidate_post_fragments(db_post.id)
     return db_post
 
 
 def admin_update_db_post(
-    session: Session, *, db_post: Post, post_in: PostUpdateByAdmin
+    session: Session, *, db_post: Post, post_in: PostUpdateByAdmin, featured_image_variants: Optional[dict] = None
 ) -> Post:
     update_data = post_in.model_dump(exclude={"tags"}, exclude_unset=True)
+    _set_image_variants(db_post, update_data, featured_image_variants)
     for key, value in update_data.items():
         setattr(db_post, key, value)
+    db_post.updated_at = utc_now()
+    deltas = {crud_count.POSTS_VERSION: 1}
 
     if post_in.tags is not None:
-        db_post.tags.clear()
-        for tag_name in post_in.tags:
-            if tag_name.strip():
-                tag_obj = crud_tag.create_db_tag(session=session, tag_in=TagCreate(name=tag_name))
-                if tag_obj not in db_post.tags:
-                    db_post.tags.append(tag_obj)
+        old_tag_names = {tag_obj.name for tag_obj in db_post.tags}
+        db_post.tags = crud_tag.get_or_create_tags(session, post_in.tags)
+        new_tag_names = {tag_obj.name for tag_obj in db_post.tags}
+        db_post.tag_count = len(new_tag_names)
+        deltas.update({crud_count.posts_by_tag_key(name): -1 for name in old_tag_names - new_tag_names})
+        deltas.update({crud_count.posts_by_tag_key(name): 1 for name in new_tag_names - old_tag_names})
+    crud_count.change_counters(session, deltas)
     
     session.add(db_post)
     session.commit()
     session.refresh(db_post)
+    page_cache.invalidate_post_pages(db_post.id)
+    fragment_cache.invalidate_post_fragments(db_post.id)
     return db_post
 
 
+def get_db_posts_featured_images(session: Session, *, post_ids: Sequence[int]) -> List[Tuple[str, Optional[dict]]]:
+    """(featured_image_url, featured_image_variants) của các bài viết có ảnh."""
+    statement = (
+        select(Post.featured_image_url, Post.featured_image_variants)
+        .where(Post.id.in_(post_ids), Post.featured_image_url.is_not(None))
+    )
+    return list(session.exec(statement).all())
+
+def delete_db_posts(session: Session, *, post_ids: Sequence[int]) -> int:
+    """
+    Xóa nhiều bài viết cùng bình luận và liên kết tag trong một transaction,
+    bằng các câu DELETE theo tập (không tải Comment/PostTagLink lên session).
+    Bộ đếm được tính từ các truy vấn GROUP BY trước khi xóa. Trả về số bài đã xóa.
+    """
+    post_ids = list(set(post_ids))
+    if not post_ids:
+        return 0
+    post_condition = Post.id.in_(post_ids)
+
+    deltas = {}
+    posts_by_owner = session.exec(
+        select(Post.owner_id, func.count(Post.id)).where(post_condition).group_by(Post.owner_id)
+    ).all()
+    for owner_id, num_posts in posts_by_owner:
+        if owner_id is not None:
+            deltas[crud_count.posts_by_author_key(owner_id)] = -num_posts
+    posts_by_tag = session.exec(
+        select(Tag.name, func.count(PostTagLink.post_id))
+        .join(Tag, PostTagLink.tag_id == Tag.id)
+        .where(PostTagLink.post_id.in_(post_ids))
+        .group_by(Tag.name)
+    ).all()
+    for tag_name, num_posts in posts_by_tag:
+        deltas[crud_count.posts_by_tag_key(tag_name)] = -num_posts
+
+    num_comments = session.exec(delete(Comment).where(Comment.post_id.in_(post_ids))).rowcount
+    session.exec(delete(PostTagLink).where(PostTagLink.post_id.in_(post_ids)))
+    num_posts = session.exec(delete(Post).where(post_condition)).rowcount
+
+    deltas[crud_count.POSTS_TOTAL] = -num_posts
+    deltas[crud_count.COMMENTS_TOTAL] = -num_comments
+    deltas[crud_count.POSTS_VERSION] = 1
+    crud_count.change_counters(session, deltas)
+    session.commit()
+    page_cache.invalidate_post_pages(*post_ids)
+    fragment_cache.invalidate_post_fragments(*post_ids)
+    return num_posts
+
 def delete_db_post(session: Session, *, db_post: Post) -> None:
-    from . import crud_comment
-    related_comments = crud_comment.get_db_comments_for_post(session=session, post_id=db_post.id, limit=1000)
-    for comment in related_comments:
-        session.delete(comment)
-    
-    session.delete(db_post)
+    delete_db_posts(session=session, post_ids=[db_post.id])
+
+
+def recount_db_post_counters(session: Session) -> None:
+    """Tính lại comment_count và tag_count của mọi bài viết từ dữ liệu thật (backfill/sửa lệch)."""
+    comment_count = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    tag_count = select(func.count(PostTagLink.tag_id)).where(PostTagLink.post_id == Post.id).scalar_subquery()
+    session.exec(update(Post).values(comment_count=comment_count, tag_count=tag_count))
+    crud_count.change_counters(session, {crud_count.POSTS_VERSION: 1})
     session.commit()
 
 
-def unset_posts_owner(session: Session, *, owner_id: int) -> None:
-    statement = select(Post).where(Post.owner_id == owner_id)
-    posts_to_update = session.exec(statement).all()
-    
-    if not posts_to_update:
-        return
+def touch_posts_of_user(session: Session, *, user_id: int) -> int:
+    """
+    Đổi updated_at của các bài viết mà user là tác giả hoặc có bình luận: thông tin của user hiển thị
+    trong các bài đó, nên ETag/Last-Modified của chúng phải đổi khi user được cập nhật. Caller commit.
+    """
+    commented_post_ids = select(Comment.post_id).where(Comment.owner_id == user_id)
+    num_updated = session.exec(
+        update(Post)
+        .where(or_(Post.owner_id == user_id, Post.id.in_(commented_post_ids)))
+        .values(updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if num_updated:
+        crud_count.change_counters(session, {crud_count.POSTS_VERSION: 1})
+    return num_updated
+
+
+def unset_posts_owner(session: Session, *, owner_id: int, limit: Optional[int] = None) -> int:
+    """
+    Gỡ owner khỏi các bài viết của owner_id bằng một câu UPDATE; trả về số bài đã cập nhật.
+    limit: chỉ cập nhật tối đa `limit` bài (xóa user theo lô trong job chạy nền). Caller commit.
+    """
+    condition = Post.owner_id == owner_id
+    if limit is not None:
+        post_ids = session.exec(select(Post.id).where(condition).order_by(Post.id).limit(limit)).all()
+        if not post_ids:
+            return 0
+        condition = Post.id.in_(post_ids)
+
+    num_updated = session.exec(
+        update(Post)
+        .where(condition)
+        .values(owner_id=None, updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
 
-    for post in posts_to_update:
-        post.owner_id = None
-        session.add(post)
+    if limit is None:
+        crud_count.delete_counter(session, crud_count.posts_by_author_key(owner_id))
+        crud_count.change_counters(session, {crud_count.POSTS_VERSION: 1})
+    else:
+        crud_count.change_counters(
+            session, {crud_count.posts_by_author_key(owner_id): -num_updated, crud_count.POSTS_VERSION: 1}
+        )
+    return num_updated
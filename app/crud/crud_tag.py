@@ -1,32 +1,67 @@
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import insert, update, literal
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlmodel import Session, select, func, col
 
 from app.models.tag_models import Tag, TagCreate, TagUpdate, TagReadWithCount
 from app.models.link_models import PostTagLink
+from app.models.post_models import Post, utc_now
+from app.models.count_models import CountSummary
+from app.core import page_cache, fragment_cache
+from . import crud_count
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """Chuẩn hóa (lower + strip), bỏ tên rỗng và tên trùng, giữ nguyên thứ tự."""
+    return list(dict.fromkeys(name.lower().strip() for name in names if name and name.strip()))
 
 def get_db_tag_by_name(session: Session, *, name: str) -> Optional[Tag]:
-    statement = select(Tag).where(func.lower(Tag.name) == name.lower())
+    # Tên tag luôn được lưu ở dạng đã chuẩn hóa nên so sánh trực tiếp để dùng được index ix_tag_name.
+    statement = select(Tag).where(Tag.name == name.lower().strip())
     return session.exec(statement).first()
 
+def _insert_missing_tags_statement(dialect_name: str, names: List[str]):
+    rows = [{"name": name} for name in names]
+    if dialect_name == "sqlite":
+        return sqlite.insert(Tag).values(rows).on_conflict_do_nothing(index_elements=[Tag.name])
+    if dialect_name == "postgresql":
+        return postgresql.insert(Tag).values(rows).on_conflict_do_nothing(index_elements=[Tag.name])
+    if dialect_name in ("mysql", "mariadb"):
+        return mysql.insert(Tag).values(rows).prefix_with("IGNORE")
+    return insert(Tag).values(rows)
+
+def get_or_create_tags(session: Session, names: Iterable[str]) -> List[Tag]:
+    """
+    Lấy các tag theo tên, tạo những tag chưa có: một SELECT ... IN và một INSERT ... ON CONFLICT DO NOTHING
+    cho cả danh sách. Không commit - caller commit cùng với bài viết để thao tác là nguyên tử.
+    """
+    normalized_names = normalize_tag_names(names)
+    if not normalized_names:
+        return []
+
+    tags_by_name = {
+        tag.name: tag for tag in session.exec(select(Tag).where(Tag.name.in_(normalized_names))).all()
+    }
+    missing_names = [name for name in normalized_names if name not in tags_by_name]
+    if missing_names:
+        # Request khác có thể vừa tạo cùng tên: ON CONFLICT bỏ qua dòng đó, rowcount chỉ đếm dòng thật sự thêm.
+        result = session.exec(_insert_missing_tags_statement(session.get_bind().dialect.name, missing_names))
+        crud_count.change_counters(session, {crud_count.TAGS_TOTAL: result.rowcount})
+        for tag in session.exec(select(Tag).where(Tag.name.in_(missing_names))).all():
+            tags_by_name[tag.name] = tag
+
+    return [tags_by_name[name] for name in normalized_names]
+
 def get_db_tag_by_id(session: Session, *, tag_id: int) -> Optional[Tag]:
     return session.get(Tag, tag_id)
 
 def create_db_tag(session: Session, *, tag_in: TagCreate) -> Tag:
-    normalized_name = tag_in.name.lower().strip()
-    if not normalized_name:
+    db_tags = get_or_create_tags(session, [tag_in.name])
+    if not db_tags:
         raise ValueError("Tên tag không được để trống")
 
-    db_tag = get_db_tag_by_name(session, name=normalized_name)
-    if db_tag:
-        return db_tag
-
-    tag_data_for_create = TagCreate(name=normalized_name)
-    db_tag_obj = Tag.model_validate(tag_data_for_create)
-
-    session.add(db_tag_obj)
     session.commit()
-    session.refresh(db_tag_obj)
-    return db_tag_obj
+    session.refresh(db_tags[0])
+    return db_tags[0]
 
 def get_db_tags(
     session: Session, *, 
@@ -45,26 +80,18 @@ def admin_get_db_tags_with_count(
 ) -> Tuple[List[TagReadWithCount], int]:
     offset = (page - 1) * page_size
 
-    post_count_subquery = (
-        select(PostTagLink.tag_id, func.count(PostTagLink.post_id).label("posts_count"))
-        .group_by(PostTagLink.tag_id)
-        .subquery()
-    )
-
+    # Số bài viết của mỗi tag đọc từ bộ đếm 'posts:tag:<name>' thay vì GROUP BY toàn bảng posttaglink.
     statement_items = (
         select(
             Tag,
-            func.coalesce(post_count_subquery.c.posts_count, 0).label("calculated_posts_count")
+            func.coalesce(CountSummary.value, 0).label("calculated_posts_count")
         )
-        .outerjoin(post_count_subquery, Tag.id == post_count_subquery.c.tag_id)
+        .outerjoin(CountSummary, CountSummary.key == literal(crud_count.posts_by_tag_key("")) + Tag.name)
     )
-    
-    count_statement = select(func.count(Tag.id))
 
     if search_term:
         search_pattern = f"%{search_term.lower()}%"
         statement_items = statement_items.where(Tag.name.ilike(search_pattern))
-        count_statement = count_statement.where(Tag.name.ilike(search_pattern))
 
     statement_items = statement_items.order_by(Tag.name).offset(offset).limit(page_size)
     
@@ -76,18 +103,30 @@ def admin_get_db_tags_with_count(
             TagReadWithCount(id=tag_obj.id, name=tag_obj.name, posts_count=p_count)
         )
         
-    total_items = session.exec(count_statement).one_or_none() or 0
+    total_items = count_all_db_tags(session, search_term=search_term)
     
     return tags_with_count, total_items
 
 
 def count_all_db_tags(session: Session, search_term: Optional[str] = None) -> int:
-    statement = select(func.count(Tag.id))
-    if search_term:
-        search_pattern = f"%{search_term.lower()}%"
-        statement = statement.where(Tag.name.ilike(search_pattern))
+    if not search_term:
+        return crud_count.get_counter(session, crud_count.TAGS_TOTAL)
+
+    cache_key = ("tags", search_term.lower())
+    count = crud_count.get_cached_count(cache_key)
+    if count is not None:
+        return count
+
+    search_pattern = f"%{search_term.lower()}%"
+    statement = select(func.count(Tag.id)).where(Tag.name.ilike(search_pattern))
     count = session.exec(statement).one_or_none()
-    return count if count is not None else 0
+    return crud_count.set_cached_count(cache_key, count if count is not None else 0)
+
+def touch_tagged_posts(session: Session, tag_id: int) -> None:
+    # Tên tag hiển thị trong bài viết nên đổi/xóa tag cũng là thay đổi nội dung các bài đó.
+    tagged_post_ids = select(PostTagLink.post_id).where(PostTagLink.tag_id == tag_id)
+    session.exec(update(Post).where(Post.id.in_(tagged_post_ids)).values(updated_at=utc_now()))
+    crud_count.change_counters(session, {crud_count.POSTS_VERSION: 1})
 
 def update_db_tag(session: Session, *, db_tag: Tag, tag_in: TagUpdate) -> Optional[Tag]:
     if tag_in.name is None:
@@ -104,16 +143,33 @@ def update_db_tag(session: Session, *, db_tag: Tag, tag_in: TagUpdate) -> Option
     if existing_tag_with_new_name and existing_tag_with_new_name.id != db_tag.id:
         raise ValueError(f"Tên tag '{new_name_normalized}' đã tồn tại.")
 
+    crud_count.rename_counter(
+        session, crud_count.posts_by_tag_key(db_tag.name), crud_count.posts_by_tag_key(new_name_normalized)
+    )
     db_tag.name = new_name_normalized
     session.add(db_tag)
+    touch_tagged_posts(session, db_tag.id)
     session.commit()
     session.refresh(db_tag)
+    # Tên tag hiện trên mọi trang có bài viết gắn tag này.
+    page_cache.invalidate_all_pages()
+    fragment_cache.invalidate_all_fragments()
     return db_tag
 
 def delete_db_tag(session: Session, *, db_tag: Tag) -> bool:
+    tagged_post_ids = select(PostTagLink.post_id).where(PostTagLink.tag_id == db_tag.id)
+    session.exec(
+        update(Post)
+        .where(Post.id.in_(tagged_post_ids))
+        .values(tag_count=Post.tag_count - 1, updated_at=utc_now())
+    )
+    crud_count.delete_counter(session, crud_count.posts_by_tag_key(db_tag.name))
+    crud_count.change_counters(session, {crud_count.TAGS_TOTAL: -1, crud_count.POSTS_VERSION: 1})
     delete_links_statement = PostTagLink.__table__.delete().where(PostTagLink.tag_id == db_tag.id)
     session.exec(delete_links_statement)
 
     session.delete(db_tag)
     session.commit()
+    page_cache.invalidate_all_pages()
+    fragment_cache.invalidate_all_fragments()
     return True
\ No newline at end of file
@@ -0,0 +1,59 @@
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete
+
+from app.models.upload_models import Upload
+
+
+def _acquire(session: Session, condition) -> Optional[Upload]:
+    result = session.exec(update(Upload).where(condition).values(ref_count=Upload.ref_count + 1))
+    if result.rowcount == 0:
+        return None
+    session.commit()
+    return session.exec(select(Upload).where(condition)).first()
+
+def acquire_db_upload(session: Session, *, key: str) -> Optional[Upload]:
+    """Tăng ref_count nếu ảnh này đã được lưu (dedupe); None nếu chưa có."""
+    return _acquire(session, Upload.key == key)
+
+def acquire_db_upload_by_path(session: Session, *, path: str) -> Optional[Upload]:
+    """Thêm một tham chiếu tới ảnh đã lưu ở `path`; None nếu path không do bảng upload quản lý."""
+    return _acquire(session, Upload.path == path)
+
+def create_db_upload(
+    session: Session, *,
+    key: str,
+    path: str,
+    variants: Optional[dict],
+    size_bytes: int
+) -> Upload:
+    db_upload = Upload(key=key, path=path, variants=variants, size_bytes=size_bytes)
+    session.add(db_upload)
+    try:
+        session.commit()
+    except IntegrityError:
+        # Một request khác vừa lưu cùng ảnh: các file giống hệt nhau, chỉ cần tăng ref_count của bản ghi đó.
+        session.rollback()
+        existing = acquire_db_upload(session, key=key)
+        if existing is None:
+            raise
+        return existing
+    session.refresh(db_upload)
+    return db_upload
+
+def release_db_upload(session: Session, *, path: str) -> Optional[Upload]:
+    """
+    Giảm ref_count của ảnh có `path`; bản ghi bị xóa khi về 0 (cùng transaction nên không
+    tranh chấp với acquire_db_upload). Trả về Upload đã tách khỏi session với ref_count sau khi giảm
+    (0: caller xóa các file), hoặc None nếu path không do bảng upload quản lý (file upload cũ).
+    """
+    db_upload = session.exec(select(Upload).where(Upload.path == path)).first()
+    if db_upload is None:
+        return None
+    session.expunge(db_upload)
+    session.exec(update(Upload).where(Upload.id == db_upload.id).values(ref_count=Upload.ref_count - 1))
+    removed = session.exec(delete(Upload).where(Upload.id == db_upload.id, Upload.ref_count <= 0)).rowcount
+    session.commit()
+    db_upload.ref_count = 0 if removed else max(db_upload.ref_count - 1, 1)
+    return db_upload
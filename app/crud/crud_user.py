@@ -1,9 +1,22 @@
-from sqlmodel import Session, select, func, or_
+from sqlmodel import Session, select, func, or_, delete
 from typing import Optional
 from app.models.user_models import User, UserCreate, UserUpdateByAdmin
+from app.models.comment_models import Comment
 from app.core.security import get_password_hash
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core import page_cache, fragment_cache
 from . import crud_post
 from . import crud_comment
+from . import crud_count
+from . import crud_job
+
+# Snapshot các cột của User theo username, dùng cho deps.get_optional_current_user
+# để không phải query bảng user ở mỗi request đã đăng nhập.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+def invalidate_cached_user(username: str) -> None:
+    user_cache.delete(username)
 
 def get_user_by_username(session: Session, username: str) -> Optional[User]:
     statement = select(User).where(User.username == username)
@@ -13,12 +26,14 @@ def get_user_by_email(session: Session, email: str) -> Optional[User]:
     statement = select(User).where(User.email == email)
     return session.exec(statement).first()
 
-def create_db_user(session: Session, user_in: UserCreate) -> User:
+def create_db_user(session: Session, user_in: UserCreate, hashed_password: Optional[str] = None) -> User:
     user_data = user_in.model_dump(exclude={"password"})
-    hashed_password = get_password_hash(user_in.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_in.password)
     db_user = User(**user_data, hashed_password=hashed_password)
     
     session.add(db_user)
+    crud_count.change_counters(session, {crud_count.USERS_TOTAL: 1})
     session.commit()
     session.refresh(db_user)
     return db_user
@@ -47,44 +62,106 @@ def update_user_by_admin(
     session: Session, *, db_user: User, user_in: UserUpdateByAdmin
 ) -> User:
     update_data = user_in.model_dump(exclude_unset=True)
+    changed = any(getattr(db_user, key) != value for key, value in update_data.items())
     
     for key, value in update_data.items():
         setattr(db_user, key, value)
         
     session.add(db_user)
+    if changed:
+        crud_post.touch_posts_of_user(session, user_id=db_user.id)
     session.commit()
     session.refresh(db_user)
+    invalidate_cached_user(db_user.username)
+    page_cache.invalidate_all_pages()
+    # Tên/ảnh của user có trong author box, thẻ bài viết và danh sách bình luận ở mọi nơi.
+    fragment_cache.invalidate_all_fragments()
     return db_user
 
 def count_db_users(
     session: Session, *,
     search_term: Optional[str] = None
 ) -> int:
-    statement = select(func.count(User.id))
-    if search_term:
-        search_pattern = f"%{search_term}%"
-        statement = statement.where(
-            or_(
-                User.username.ilike(search_pattern),
-                User.email.ilike(search_pattern)
-            )
+    if not search_term:
+        return crud_count.get_counter(session, crud_count.USERS_TOTAL)
+
+    cache_key = ("users", search_term)
+    count = crud_count.get_cached_count(cache_key)
+    if count is not None:
+        return count
+
+    search_pattern = f"%{search_term}%"
+    statement = select(func.count(User.id)).where(
+        or_(
+            User.username.ilike(search_pattern),
+            User.email.ilike(search_pattern)
         )
+    )
     count = session.exec(statement).one_or_none()
-    return count if count is not None else 0
+    return crud_count.set_cached_count(cache_key, count if count is not None else 0)
+
+def count_db_user_content(session: Session, *, user_id: int) -> int:
+    """Số bài viết + bình luận phải xử lý khi xóa user, dùng để chọn xóa ngay hay chạy nền."""
+    num_posts = crud_count.get_counter(session, crud_count.posts_by_author_key(user_id))
+    num_comments = session.exec(select(func.count(Comment.id)).where(Comment.owner_id == user_id)).one()
+    return num_posts + num_comments
 
 def delete_db_user(session: Session, *, user_to_delete: User) -> bool:
+    """Xóa user trong một transaction bằng các câu UPDATE/DELETE theo tập, không tải bài viết/bình luận."""
     if not user_to_delete:
         return False
 
     user_id_to_delete = user_to_delete.id
+    username_to_delete = user_to_delete.username
 
     try:
         crud_post.unset_posts_owner(session=session, owner_id=user_id_to_delete)
         crud_comment.delete_db_comments_by_owner(session=session, owner_id=user_id_to_delete)
-        session.delete(user_to_delete)
+        session.exec(delete(User).where(User.id == user_id_to_delete))
+        crud_count.change_counters(session, {crud_count.USERS_TOTAL: -1})
         session.commit()
+        invalidate_cached_user(username_to_delete)
+        page_cache.invalidate_all_pages()
+        fragment_cache.invalidate_all_fragments()
         return True
     except Exception as e:
         session.rollback()
-        print(f"Error deleting user {user_to_delete.username}: {e}")
-        raise e
\ No newline at end of file
+        print(f"Error deleting user {username_to_delete}: {e}")
+        raise e
+
+def delete_db_user_in_batches(
+    session: Session, *,
+    user_id: int,
+    batch_size: int = settings.USER_DELETE_BATCH_SIZE,
+    job_id: Optional[str] = None
+) -> bool:
+    """
+    Xóa user có rất nhiều nội dung: mỗi lô `batch_size` dòng là một transaction ngắn
+    để không khóa database lâu. User bị vô hiệu hóa trước để không thể đăng thêm nội dung.
+    """
+    db_user = get_db_user_by_id(session=session, user_id=user_id)
+    if not db_user:
+        return False
+
+    db_user.is_active = False
+    session.add(db_user)
+    session.commit()
+    invalidate_cached_user(db_user.username)
+
+    try:
+        while True:
+            num_processed = crud_comment.delete_db_comments_by_owner(session=session, owner_id=user_id, limit=batch_size)
+            if not num_processed:
+                num_processed = crud_post.unset_posts_owner(session=session, owner_id=user_id, limit=batch_size)
+            if not num_processed:
+                break
+            if job_id:
+                crud_job.advance_job(session, job_id=job_id, amount=num_processed)
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error deleting content of user {db_user.username}: {e}")
+        raise e
+
+    # Các lô đã commit vẫn giữ nguyên nếu có lỗi; chạy lại job sẽ tiếp tục từ chỗ dừng.
+    return delete_db_user(session=session, user_to_delete=db_user)
@@ -1,12 +1,117 @@
+from typing import AsyncGenerator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(settings.DATABASE_URL, echo=True, connect_args=connect_args)
+# Driver async tương ứng với từng backend của DATABASE_URL.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    if settings.SQLITE_JOURNAL_MODE.isalpha():
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    if settings.SQLITE_SYNCHRONOUS.isalpha():
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    # Giá trị âm: kích thước cache tính theo KiB thay vì số trang.
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def create_db_engine(database_url: str = settings.DATABASE_URL) -> Engine:
+    """
+    Tạo engine theo cấu hình trong Settings.
+    SQLite: bật WAL, busy timeout và các pragma khác cho mỗi connection mới.
+    Các DB khác (Postgres, MySQL): chỉ áp dụng cấu hình pool.
+    """
+    url = make_url(database_url)
+    engine_kwargs = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    is_sqlite = url.get_backend_name() == "sqlite"
+    is_sqlite_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    if not is_sqlite_memory:
+        # SQLite in-memory dùng SingletonThreadPool, không nhận các tham số pool này.
+        engine_kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if is_sqlite:
+        engine_kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+
+    db_engine = create_engine(url, **engine_kwargs)
+
+    if is_sqlite:
+        event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+
+    return db_engine
+
+
+def _to_async_url(database_url: str) -> URL:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Không hỗ trợ async cho database backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_db_engine(database_url: str = settings.DATABASE_URL) -> AsyncEngine:
+    """Phiên bản async của create_db_engine: cùng cấu hình pool và pragma SQLite."""
+    url = _to_async_url(database_url)
+    engine_kwargs = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    is_sqlite = url.get_backend_name() == "sqlite"
+    if not (is_sqlite and url.database in (None, "", ":memory:")):
+        engine_kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if is_sqlite:
+        engine_kwargs["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+    db_engine = create_async_engine(url, **engine_kwargs)
+
+    if is_sqlite:
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+    return db_engine
+
+
+engine = create_db_engine()
+async_engine = create_async_db_engine()
 
 def create_db_and_tables():
     pass
 
 def get_session_local():
      with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_async_session_local() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False: object vẫn đọc được sau commit mà không cần lazy load (không được phép trong async).
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import pathlib
 from starlette.middleware.sessions import SessionMiddleware
@@ -9,13 +8,23 @@ from app.routers.router_api_v1 import api_v1_router
 from app.routers.router_pages import router as pages_router
 from app.routers.router_admin import router as admin_router
 from app.core.config import settings
+from app.core import security, static_assets
+from app.core.templates import warm_templates
+from app.core.compression import CompressionMiddleware
+from app.utils import image_processing
 
 APP_ROOT_DIR = pathlib.Path(__file__).resolve().parent
 
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):
     print("Lifespan event: Startup - Database schema managed by Alembic.")
+    if settings.STATIC_ASSETS_BUILD_ON_STARTUP:
+        static_assets.build_static_assets()
+    if settings.TEMPLATE_WARMUP_ON_STARTUP:
+        warm_templates()
     yield
+    security.shutdown_password_executor()
+    image_processing.shutdown_image_executor()
     print("Lifespan event: Shutdown")
 
 app = FastAPI(
@@ -23,13 +32,25 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+@app.exception_handler(security.PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: security.PasswordHasherBusy):
+    return PlainTextResponse(
+        "Hệ thống đang bận xử lý đăng nhập, vui lòng thử lại sau giây lát.",
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
 app.add_middleware(
     SessionMiddleware, secret_key=settings.SECRET_KEY
 )
 
+if settings.COMPRESSION_ENABLED:
+    # Thêm sau cùng nên bọc ngoài cùng: nén cả response của SessionMiddleware và StaticFiles.
+    app.add_middleware(CompressionMiddleware)
+
 app.mount(
     "/static",
-    StaticFiles(directory=str(APP_ROOT_DIR / "static")),
+    static_assets.PrecompressedStaticFiles(directory=str(APP_ROOT_DIR / "static")),
     name="static"
 )
 
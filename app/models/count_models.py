@@ -0,0 +1,8 @@
+from sqlmodel import Field, SQLModel
+
+class CountSummary(SQLModel, table=True):
+    """Bộ đếm tổng được các hàm CRUD cập nhật cùng transaction ghi (xem app/crud/crud_count.py)."""
+    __tablename__ = "count_summary"
+
+    key: str = Field(primary_key=True, max_length=150)
+    value: int = Field(default=0)
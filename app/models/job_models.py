@@ -0,0 +1,40 @@
+import datetime
+from typing import ClassVar, Optional
+from sqlmodel import Field, SQLModel
+
+from .post_models import utc_now
+
+
+class BackgroundJob(SQLModel, table=True):
+    """
+    Tiến độ của một job chạy nền: `done`/`total` đơn vị công việc (ví dụ số dòng đã xử lý).
+    Lưu trong database để mọi worker đều thấy, kể cả sau khi khởi động lại (xem app/crud/crud_job.py).
+    """
+    __tablename__ = "background_job"
+
+    RUNNING: ClassVar[str] = "running"
+    DONE: ClassVar[str] = "done"
+    FAILED: ClassVar[str] = "failed"
+
+    id: str = Field(primary_key=True, max_length=100)
+    description: str = Field(max_length=255)
+    total: int = Field(default=0)
+    done: int = Field(default=0)
+    status: str = Field(default="running", max_length=20, index=True)
+    error: Optional[str] = Field(default=None)
+    started_at: datetime.datetime = Field(default_factory=utc_now)
+    # Cập nhật sau mỗi lô: job "running" lâu không đổi là job của worker đã dừng.
+    updated_at: datetime.datetime = Field(default_factory=utc_now)
+    finished_at: Optional[datetime.datetime] = Field(default=None)
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == self.RUNNING
+
+    @property
+    def percent(self) -> int:
+        if self.status == self.DONE:
+            return 100
+        if self.total <= 0:
+            return 0
+        return min(99, self.done * 100 // self.total)
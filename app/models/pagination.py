@@ -5,14 +5,16 @@ ItemType = TypeVar('ItemType')
 
 class Page(BaseModel, Generic[ItemType]):
     items: list[ItemType]
-    total_items: int = Field(ge=0)
+    total_items: Optional[int] = Field(default=None, ge=0)
     page: int = Field(ge=1)
     page_size: int = Field(ge=1)
-    total_pages: int = Field(ge=0)
+    total_pages: Optional[int] = Field(default=None, ge=0)
     has_next: bool
     has_previous: bool
     search_query: Optional[str] = None
     active_tags: Optional[List[str]] = None
+    sort: Optional[str] = None
+    next_cursor: Optional[str] = None
     
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import Index, JSON
 from sqlmodel import Field, SQLModel, Relationship
 import datetime
 from typing import Optional, TYPE_CHECKING, List
@@ -9,6 +10,10 @@ if TYPE_CHECKING:
     from .comment_models import Comment, CommentRead
 
 
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
 class PostBase(SQLModel):
     title: str
     content: str
@@ -26,8 +31,18 @@ class PostUpdateByAdmin(PostUpdate):
     tags: Optional[List[str]] = None
 
 class Post(PostBase, table=True):
+    __table_args__ = (Index("ix_post_created_at_id", "created_at", "id"),)
+
     id: Optional[int] = Field(unique=True, primary_key=True, index=True)
+    # Các biến thể đã resize của ảnh upload (xem app/utils/image_processing.py), dùng cho srcset.
+    # Chỉ server ghi (từ SavedImage khi xử lý upload), không có trong PostCreate/PostUpdate.
+    featured_image_variants: Optional[dict] = Field(default=None, sa_type=JSON(none_as_null=True))
     created_at: datetime.datetime = Field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # Lần cuối nội dung hiển thị của bài thay đổi (bài viết, bình luận, tag, tác giả); dùng cho ETag/Last-Modified.
+    updated_at: datetime.datetime = Field(default_factory=utc_now, index=True)
+    # Số đếm phi chuẩn hóa, được app/crud cập nhật cùng transaction ghi bình luận/tag.
+    comment_count: int = Field(default=0)
+    tag_count: int = Field(default=0)
     owner_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
     owner: Optional["User"] = Relationship(back_populates="posts")
     comments: List["Comment"] = Relationship(back_populates="post")
@@ -35,10 +50,30 @@ class Post(PostBase, table=True):
 
 class PostRead(PostBase):
     id: int
+    featured_image_variants: Optional[dict] = None
     created_at: datetime.datetime
+    updated_at: Optional[datetime.datetime] = None
     owner_id: Optional[int] = None
+    comment_count: int = 0
+    tag_count: int = 0
+
+class PostSummary(SQLModel):
+    id: int
+    title: str
+    excerpt: str
+    featured_image_url: Optional[str] = None
+    featured_image_variants: Optional[dict] = None
+    created_at: datetime.datetime
+    owner_id: Optional[int] = None
+    author_name: Optional[str] = None
+    comment_count: int = 0
+    tags: List[TagRead] = []
 
 class PostReadWithDetails(PostRead):
     owner: Optional["UserRead"] = None
     comments: List["CommentRead"] = []
-    tags: List[TagRead] = []
\ No newline at end of file
+    tags: List[TagRead] = []
+
+from .user_models import UserRead
+from .comment_models import CommentRead
+PostReadWithDetails.model_rebuild()
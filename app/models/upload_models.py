@@ -0,0 +1,32 @@
+import datetime
+from typing import Optional
+from sqlalchemy import JSON
+from sqlmodel import Field, SQLModel
+
+
+class Upload(SQLModel, table=True):
+    """
+    Ảnh đã upload, lưu theo nội dung (SHA-256) nên cùng một ảnh chỉ có một bộ file trên đĩa.
+    ref_count là số bản ghi (bài viết, ảnh profile) đang trỏ tới; file chỉ bị xóa khi về 0.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # "<sha256 của file gốc>:<profile xử lý ảnh>" (xem app/utils/image_processing.IMAGE_PROFILES).
+    key: str = Field(unique=True, index=True, max_length=100)
+    # Biến thể lớn nhất, chính là giá trị lưu trong featured_image_url/profile_picture_url.
+    path: str = Field(index=True, max_length=255)
+    variants: Optional[dict] = Field(default=None, sa_type=JSON(none_as_null=True))
+    size_bytes: int = Field(default=0)
+    ref_count: int = Field(default=1)
+    created_at: datetime.datetime = Field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+
+class PresignedUploadRequest(SQLModel):
+    filename: str = Field(max_length=255)
+    content_type: str = Field(max_length=100)
+    size_bytes: int = Field(gt=0)
+
+class PresignedUploadRead(SQLModel):
+    """Trình duyệt POST file tới `url` kèm `fields`, rồi gửi `key` cùng form tạo bài viết."""
+    key: str
+    url: str
+    fields: dict
@@ -1,12 +1,10 @@
 from fastapi import (
-    APIRouter, Depends, Request, Query, Form, HTTPException, status, UploadFile, File
+    APIRouter, Depends, Request, Query, Form, HTTPException, status, UploadFile, File, BackgroundTasks
 )
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-import pathlib
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 import datetime
 import urllib.parse
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 from app.api import deps
 from app.models.user_models import User, UserUpdateByAdmin 
@@ -14,38 +12,32 @@ from app.models.post_models import Post, PostReadWithDetails, PostUpdateByAdmin
 from app.models.comment_models import CommentReadWithAuthor, Comment
 from app.models.tag_models import TagReadWithCount, TagUpdate as TagUpdateSchema
 from app.core.config import settings
-from app.crud import crud_user, crud_post, crud_comment, crud_tag
+from app.core.templates import templates
+from app.crud import crud_user, crud_post, crud_comment, crud_tag, crud_job
 from sqlmodel import Session as SQLModelSession
-from app.utils.file_upload import save_upload_file, delete_static_file
+from app.utils.file_upload import save_upload_image, release_upload
+from app.utils.ndjson_export import iter_ndjson
+from app.utils.user_deletion import user_deletion_job_id, run_user_deletion_job
 
 router = APIRouter(
     tags=["Admin Panel"],
     dependencies=[Depends(deps.get_current_admin_user)]
 )
 
-APP_DIR = pathlib.Path(__file__).resolve().parent.parent
-templates = Jinja2Templates(directory=str(APP_DIR / "templates"))
-
-def get_current_year():
-    return datetime.datetime.now(datetime.timezone.utc).year
-
-templates.env.globals["settings"] = settings
-templates.env.globals["get_current_year"] = get_current_year
-
 def add_flash_message(request: Request, category: str, message: str):
     if 'flash_messages' not in request.session:
         request.session['flash_messages'] = []
     request.session['flash_messages'].append((category, message))
 
 @router.get("/", response_class=HTMLResponse, name="admin_dashboard_page")
-async def admin_dashboard(
+def admin_dashboard(
     request: Request,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user)
 ):
     total_users = crud_user.count_db_users(session=db)
-    _, total_posts = crud_post.get_db_posts(session=db, page=1, page_size=1)
-    _, total_comments = crud_comment.admin_get_db_comments(session=db, page=1, page_size=1)
+    total_posts = crud_post.count_db_posts(session=db)
+    total_comments = crud_comment.count_db_comments(session=db)
     total_tags = crud_tag.count_all_db_tags(session=db)
 
     context = {
@@ -59,8 +51,35 @@ async def admin_dashboard(
     }
     return templates.TemplateResponse("admin/admin_dashboard.html", context)
 
+@router.get("/export/{kind}", name="admin_export_ndjson")
+def admin_export_ndjson(
+    kind: Literal["posts", "comments", "users"],
+    db: SQLModelSession = Depends(deps.get_db),
+    gzip: bool = Query(False, description="Nén gzip (tải về file .ndjson.gz)"),
+    created_from: Optional[datetime.date] = Query(None, description="Từ ngày (YYYY-MM-DD), áp dụng cho posts/comments"),
+    created_to: Optional[datetime.date] = Query(None, description="Đến hết ngày (YYYY-MM-DD), áp dụng cho posts/comments"),
+    author: Optional[str] = Query(None, description="Username tác giả (với users: chỉ user này)"),
+    tag: Optional[str] = Query(None, description="Tên tag, áp dụng cho posts/comments")
+):
+    author_id = None
+    if author:
+        author_user = crud_user.get_user_by_username(session=db, username=author)
+        if not author_user:
+            raise HTTPException(status_code=404, detail=f"Không tìm thấy người dùng '{author}'.")
+        author_id = author_user.id
+
+    filename = f"{kind}-{datetime.date.today().isoformat()}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        iter_ndjson(
+            kind, compress=gzip,
+            created_from=created_from, created_to=created_to, author_id=author_id, tag=tag
+        ),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/users/", response_class=HTMLResponse, name="admin_manage_users_page")
-async def admin_manage_users(
+def admin_manage_users(
     request: Request,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user),
@@ -94,7 +113,7 @@ async def admin_manage_users(
     return templates.TemplateResponse("admin/users_list.html", context)
 
 @router.get("/users/{user_id}/edit/", response_class=HTMLResponse, name="admin_edit_user_form_page")
-async def admin_edit_user_form(
+def admin_edit_user_form(
     request: Request,
     user_id: int,
     db: SQLModelSession = Depends(deps.get_db),
@@ -114,7 +133,7 @@ async def admin_edit_user_form(
     return templates.TemplateResponse("admin/user_edit_form.html", context)
 
 @router.post("/users/{user_id}/edit/", name="admin_handle_edit_user_form")
-async def admin_handle_edit_user_form(
+def admin_handle_edit_user_form(
     request: Request,
     user_id: int,
     db: SQLModelSession = Depends(deps.get_db),
@@ -139,16 +158,16 @@ async def admin_handle_edit_user_form(
     
     if delete_profile_picture == "on": 
         if user_to_edit.profile_picture_url:
-            await delete_static_file(user_to_edit.profile_picture_url)
+            release_upload(db, user_to_edit.profile_picture_url)
         new_profile_picture_path = None
     elif profile_picture_file and profile_picture_file.filename:
 
         if user_to_edit.profile_picture_url:
-            await delete_static_file(user_to_edit.profile_picture_url)
+            release_upload(db, user_to_edit.profile_picture_url)
         
-        saved_path = await save_upload_file(profile_picture_file, max_size_mb=1)
-        if saved_path:
-            new_profile_picture_path = saved_path
+        saved_image = save_upload_image(db, profile_picture_file, profile="avatar", max_size_mb=1)
+        if saved_image:
+            new_profile_picture_path = saved_image.path
         else:
             add_flash_message(request, 'danger', 'Upload ảnh profile thất bại. Ảnh phải là JPG, PNG, GIF, WEBP và nhỏ hơn 1MB.')
             return RedirectResponse(url=request.url_for('admin_edit_user_form_page', user_id=user_id), status_code=status.HTTP_303_SEE_OTHER)
@@ -156,11 +175,11 @@ async def admin_handle_edit_user_form(
         if user_to_edit.profile_picture_url and user_to_edit.profile_picture_url != profile_picture_url_input.strip():
 
             if user_to_edit.profile_picture_url.startswith("uploads/"):
-                 await delete_static_file(user_to_edit.profile_picture_url)
+                 release_upload(db, user_to_edit.profile_picture_url)
         new_profile_picture_path = profile_picture_url_input.strip()
     elif profile_picture_url_input == "": 
         if user_to_edit.profile_picture_url and user_to_edit.profile_picture_url.startswith("uploads/"):
-            await delete_static_file(user_to_edit.profile_picture_url)
+            release_upload(db, user_to_edit.profile_picture_url)
         new_profile_picture_path = None
 
 
@@ -204,12 +223,18 @@ async def admin_handle_edit_user_form(
     return RedirectResponse(url=request.url_for('admin_edit_user_form_page', user_id=user_id), status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/users/{user_id}/delete/", name="admin_delete_user_action")
-async def admin_delete_user(
+def admin_delete_user(
     request: Request,
     user_id: int,
+    background_tasks: BackgroundTasks,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user)
 ):
+    job_id = user_deletion_job_id(user_id)
+    running_job = crud_job.get_job(session=db, job_id=job_id)
+    if running_job and running_job.is_running:
+        return RedirectResponse(url=request.url_for('admin_job_status_page', job_id=job_id), status_code=status.HTTP_303_SEE_OTHER)
+
     user_to_delete = crud_user.get_db_user_by_id(session=db, user_id=user_id)
 
     if not user_to_delete:
@@ -221,9 +246,20 @@ async def admin_delete_user(
         return RedirectResponse(url=request.url_for('admin_manage_users_page'), status_code=status.HTTP_303_SEE_OTHER)
 
     if user_to_delete.profile_picture_url and user_to_delete.profile_picture_url.startswith("uploads/"):
-        await delete_static_file(user_to_delete.profile_picture_url)
+        release_upload(db, user_to_delete.profile_picture_url)
 
     deleted_username = user_to_delete.username
+    content_count = crud_user.count_db_user_content(session=db, user_id=user_id)
+    if content_count > settings.USER_DELETE_BACKGROUND_THRESHOLD:
+        # Tài khoản quá lớn để xóa trong một request: chạy nền theo lô, admin theo dõi tiến độ.
+        job = crud_job.start_job(
+            session=db, job_id=job_id, description=f"Xóa người dùng '{deleted_username}'", total=content_count
+        )
+        if job:
+            background_tasks.add_task(run_user_deletion_job, user_id, job_id)
+            add_flash_message(request, 'info', f"Người dùng '{deleted_username}' có {content_count} bài viết/bình luận, đang xóa trong nền.")
+        return RedirectResponse(url=request.url_for('admin_job_status_page', job_id=job_id), status_code=status.HTTP_303_SEE_OTHER)
+
     try:
         crud_user.delete_db_user(session=db, user_to_delete=user_to_delete)
         add_flash_message(request, 'success', f"Đã xóa thành công người dùng '{deleted_username}'.")
@@ -234,8 +270,25 @@ async def admin_delete_user(
     return RedirectResponse(url=request.url_for('admin_manage_users_page'), status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.get("/jobs/{job_id}", response_class=HTMLResponse, name="admin_job_status_page")
+def admin_job_status(
+    request: Request,
+    job_id: str,
+    db: SQLModelSession = Depends(deps.get_db)
+):
+    job = crud_job.get_job(session=db, job_id=job_id)
+    if not job:
+        add_flash_message(request, 'warning', 'Không tìm thấy tác vụ (có thể đã hết hạn).')
+        return RedirectResponse(url=request.url_for('admin_manage_users_page'), status_code=status.HTTP_303_SEE_OTHER)
+    context = {
+        "request": request,
+        "job": job,
+        "page_title": "Tiến độ tác vụ"
+    }
+    return templates.TemplateResponse("admin/job_status.html", context)
+
 @router.get("/posts/", response_class=HTMLResponse, name="admin_manage_posts_page")
-async def admin_manage_posts(
+def admin_manage_posts(
     request: Request,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user),
@@ -244,7 +297,7 @@ async def admin_manage_posts(
     search: Optional[str] = Query(None)
 ):
     posts_list, total_posts_count = crud_post.get_db_posts(
-        session=db, page=page, page_size=page_size, search=search
+        session=db, page=page, page_size=page_size, search=search, options=crud_post.POST_LOAD_LIST
     )
 
     total_pages = (total_posts_count + page_size - 1) // page_size if total_posts_count > 0 else 0
@@ -269,13 +322,13 @@ async def admin_manage_posts(
     return templates.TemplateResponse("admin/admin_posts_list.html", context)
 
 @router.get("/posts/{post_id}/edit/", response_class=HTMLResponse, name="admin_edit_post_form_page")
-async def admin_edit_post_form(
+def admin_edit_post_form(
     request: Request,
     post_id: int,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user)
 ):
-    post_to_edit = crud_post.get_db_post(session=db, post_id=post_id)
+    post_to_edit = crud_post.get_db_post(session=db, post_id=post_id, options=crud_post.POST_LOAD_LIST)
     if not post_to_edit:
         add_flash_message(request, 'warning', 'Bài viết không tồn tại.')
         return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
@@ -292,7 +345,7 @@ async def admin_edit_post_form(
     return templates.TemplateResponse("admin/admin_post_edit_form.html", context)
 
 @router.post("/posts/{post_id}/edit/", name="admin_handle_edit_post_form")
-async def admin_handle_edit_post_form(
+def admin_handle_edit_post_form(
     request: Request,
     post_id: int,
     db: SQLModelSession = Depends(deps.get_db),
@@ -313,19 +366,22 @@ async def admin_handle_edit_post_form(
 
 
     new_featured_image_path: Optional[str] = db_post.featured_image_url 
+    new_featured_image_variants: Optional[dict] = db_post.featured_image_variants
 
     if delete_featured_image == "on": 
         if db_post.featured_image_url: 
-            await delete_static_file(db_post.featured_image_url) 
+            release_upload(db, db_post.featured_image_url, db_post.featured_image_variants)
         new_featured_image_path = None 
+        new_featured_image_variants = None
     elif featured_image_file and featured_image_file.filename:
         
         if db_post.featured_image_url:
-            await delete_static_file(db_post.featured_image_url)
+            release_upload(db, db_post.featured_image_url, db_post.featured_image_variants)
         
-        saved_path = await save_upload_file(featured_image_file, max_size_mb=2)
-        if saved_path:
-            new_featured_image_path = saved_path
+        saved_image = save_upload_image(db, featured_image_file, max_size_mb=2)
+        if saved_image:
+            new_featured_image_path = saved_image.path
+            new_featured_image_variants = saved_image.variants
         else:
             add_flash_message(request, 'danger', 'Upload ảnh đại diện thất bại. Ảnh phải là JPG, PNG, GIF, WEBP và nhỏ hơn 2MB.')
             
@@ -336,18 +392,20 @@ async def admin_handle_edit_post_form(
         "title": title,
         "content": content,
         "tags": tag_names_list,
-        "featured_image_url": new_featured_image_path 
+        "featured_image_url": new_featured_image_path,
     }
     
     post_in_update = PostUpdateByAdminSchema(**post_update_data)
     
-    updated_post = crud_post.admin_update_db_post(session=db, db_post=db_post, post_in=post_in_update)
+    updated_post = crud_post.admin_update_db_post(
+        session=db, db_post=db_post, post_in=post_in_update, featured_image_variants=new_featured_image_variants
+    )
     add_flash_message(request, 'success', f"Cập nhật bài viết '{updated_post.title}' thành công!")
 
     return RedirectResponse(url=request.url_for('admin_edit_post_form_page', post_id=updated_post.id), status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/posts/{post_id}/delete/", name="admin_delete_post_action")
-async def admin_delete_post(
+def admin_delete_post(
     request: Request,
     post_id: int,
     db: SQLModelSession = Depends(deps.get_db)
@@ -357,8 +415,8 @@ async def admin_delete_post(
         add_flash_message(request, 'warning', 'Bài viết không tồn tại.')
         return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
 
-    if post_to_delete.featured_image_url and post_to_delete.featured_image_url.startswith("uploads/"):
-        await delete_static_file(post_to_delete.featured_image_url)
+    if post_to_delete.featured_image_url:
+        release_upload(db, post_to_delete.featured_image_url, post_to_delete.featured_image_variants)
 
     deleted_post_title = post_to_delete.title
     try:
@@ -370,9 +428,35 @@ async def admin_delete_post(
 
     return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
 
+@router.post("/posts/bulk-delete/", name="admin_bulk_delete_posts_action")
+def admin_bulk_delete_posts(
+    request: Request,
+    post_ids: List[int] = Form([]),
+    db: SQLModelSession = Depends(deps.get_db)
+):
+    if not post_ids:
+        add_flash_message(request, 'warning', 'Chưa chọn bài viết nào để xóa.')
+        return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
+
+    images = crud_post.get_db_posts_featured_images(session=db, post_ids=post_ids)
+    try:
+        num_deleted = crud_post.delete_db_posts(session=db, post_ids=post_ids)
+        add_flash_message(request, 'success', f"Đã xóa {num_deleted} bài viết và các bình luận liên quan.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error during bulk post deletion: {e}")
+        add_flash_message(request, 'danger', 'Có lỗi xảy ra khi xóa các bài viết đã chọn. Vui lòng kiểm tra log server.')
+        return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
+
+    # Chỉ xóa file ảnh sau khi transaction đã commit.
+    for image_url, image_variants in images:
+        release_upload(db, image_url, image_variants)
+
+    return RedirectResponse(url=request.url_for('admin_manage_posts_page'), status_code=status.HTTP_303_SEE_OTHER)
+
 
 @router.get("/comments/", response_class=HTMLResponse, name="admin_manage_comments_page")
-async def admin_manage_comments(
+def admin_manage_comments(
     request: Request,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user),
@@ -381,7 +465,8 @@ async def admin_manage_comments(
     search: Optional[str] = Query(None)
 ):
     comments_list, total_comments_count = crud_comment.admin_get_db_comments(
-        session=db, page=page, page_size=page_size, search_term=search
+        session=db, page=page, page_size=page_size, search_term=search,
+        options=crud_comment.COMMENT_LOAD_ADMIN
     )
 
     total_pages = (total_comments_count + page_size - 1) // page_size if total_comments_count > 0 else 0
@@ -406,7 +491,7 @@ async def admin_manage_comments(
     return templates.TemplateResponse("admin/admin_comments_list.html", context)
 
 @router.post("/comments/{comment_id}/delete/", name="admin_delete_comment_action")
-async def admin_delete_comment(
+def admin_delete_comment(
     request: Request,
     comment_id: int,
     db: SQLModelSession = Depends(deps.get_db)
@@ -428,7 +513,7 @@ async def admin_delete_comment(
 
 # === TAG MANAGEMENT ===
 @router.get("/tags/", response_class=HTMLResponse, name="admin_manage_tags_page")
-async def admin_manage_tags(
+def admin_manage_tags(
     request: Request,
     db: SQLModelSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user),
@@ -462,7 +547,7 @@ async def admin_manage_tags(
     return templates.TemplateResponse("admin/admin_tags_list.html", context)
 
 @router.get("/tags/{tag_id}/edit/", response_class=HTMLResponse, name="admin_edit_tag_form_page")
-async def admin_edit_tag_form(
+def admin_edit_tag_form(
     request: Request,
     tag_id: int,
     db: SQLModelSession = Depends(deps.get_db),
@@ -482,7 +567,7 @@ async def admin_edit_tag_form(
     return templates.TemplateResponse("admin/admin_tag_edit_form.html", context)
 
 @router.post("/tags/{tag_id}/edit/", name="admin_handle_edit_tag_form")
-async def admin_handle_edit_tag_form(
+def admin_handle_edit_tag_form(
     request: Request,
     tag_id: int,
     db: SQLModelSession = Depends(deps.get_db),
@@ -512,7 +597,7 @@ async def admin_handle_edit_tag_form(
 
 
 @router.post("/tags/{tag_id}/delete/", name="admin_delete_tag_action")
-async def admin_delete_tag(
+def admin_delete_tag(
     request: Request,
     tag_id: int,
     db: SQLModelSession = Depends(deps.get_db)
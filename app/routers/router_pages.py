@@ -2,30 +2,20 @@ from fastapi import (
     APIRouter, Request, Depends, Query, HTTPException, Form, status, UploadFile, File
 )
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-import pathlib
 from sqlmodel import Session
-from typing import Optional, List
-import datetime
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional, List, Literal
 from pydantic import EmailStr, ValidationError as PydanticValidationError
 from app.api import deps
 from app.crud import crud_post, crud_user, crud_comment 
+from app.crud import aio
 from app.models.post_models import PostReadWithDetails, PostCreate as PostCreateSchema
 from app.models.user_models import User, UserRead, UserCreate as UserCreateSchema 
 from app.models.comment_models import CommentCreate as CommentCreateSchema
 from app.core.config import settings
-from app.core import security
-import urllib.parse
-from app.utils.file_upload import save_upload_file
-
-APP_DIR = pathlib.Path(__file__).resolve().parent.parent
-templates = Jinja2Templates(directory=str(APP_DIR / "templates"))
-
-def get_current_year():
-    return datetime.datetime.now(datetime.timezone.utc).year
-templates.env.globals["settings"] = settings
-templates.env.globals["get_current_year"] = get_current_year
-templates.env.filters['urlencode'] = urllib.parse.quote_plus
+from app.core.templates import templates
+from app.core import security, page_cache, http_cache
+from app.utils.file_upload import save_upload_image, save_incoming_image, release_upload
 
 router = APIRouter(
     tags=["Frontend Web Pages"],
@@ -43,26 +33,55 @@ async def home_page_frontend(
     page_size: int = Query(6, ge=1, le=20, description="Số lượng item trên mỗi trang"),
     search: Optional[str] = Query(None, description="Từ khóa tìm kiếm trong tiêu đề hoặc nội dung bài viết"),
     tags: Optional[str] = Query(None, description="Lọc bài viết theo chuỗi tên tag, phân cách bởi dấu phẩy (VD: python,fastapi)"),
-    session: Session = Depends(deps.get_db),
+    sort: Literal["newest", "relevance"] = Query(crud_post.POST_SORT_NEWEST, description="Sắp xếp: newest (mới nhất) hoặc relevance (độ liên quan khi tìm kiếm)"),
+    after: Optional[str] = Query(None, description="Cursor của trang trước (phân trang keyset cho feed/crawler)"),
+    session: AsyncSession = Depends(deps.get_async_db),
     current_user: Optional[User] = Depends(deps.get_optional_current_user)
 ):
+    cached_response = page_cache.get_cached_page(request, current_user)
+    if cached_response is not None:
+        return cached_response
+
+    list_version = await aio.crud_post.get_db_post_list_version(session)
+    etag = http_cache.make_etag("home", current_user.id if current_user else None, list_version)
+    if not request.session.get("flash_messages") and http_cache.is_not_modified(request, etag, None):
+        return http_cache.not_modified_response(etag, None, headers={"Vary": "Cookie"})
+
     active_tags_list: Optional[List[str]] = None
     if tags:
         processed_tags = [t.strip().lower() for t in tags.split(',') if t.strip()]
         if processed_tags:
             active_tags_list = sorted(list(set(processed_tags)))
 
-    posts_on_page, total_items = crud_post.get_db_posts(
-        session=session,
-        page=page,
-        page_size=page_size,
-        search=search,
-        filter_tags=active_tags_list
-    )
+    next_cursor: Optional[str] = None
+    if after:
+        try:
+            posts_on_page, next_cursor = await aio.crud_post.get_db_post_summaries_after(
+                session=session,
+                page_size=page_size,
+                after=after,
+                search=search,
+                filter_tags=active_tags_list
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor phân trang không hợp lệ")
+        total_items = None
+        total_pages = 0
+        has_next = next_cursor is not None
+        has_previous = True
+    else:
+        posts_on_page, total_items = await aio.crud_post.get_db_post_summaries(
+            session=session,
+            page=page,
+            page_size=page_size,
+            search=search,
+            filter_tags=active_tags_list,
+            sort=sort
+        )
 
-    total_pages = (total_items + page_size - 1) // page_size if total_items > 0 else 0
-    has_next = page < total_pages
-    has_previous = page > 1
+        total_pages = (total_items + page_size - 1) // page_size if total_items > 0 else 0
+        has_next = page < total_pages
+        has_previous = page > 1
 
     context = {
         "request": request,
@@ -73,13 +92,17 @@ async def home_page_frontend(
         "total_pages": total_pages,
         "has_next": has_next,
         "has_previous": has_previous,
+        "next_cursor": next_cursor,
         "search_query": search,
+        "sort": sort,
         "active_tags_string": tags,
         "active_tags_list_display": active_tags_list,
         "page_title": "Trang chủ",
         "current_user": current_user
     }
-    return templates.TemplateResponse("posts/list.html", context)
+    response = templates.TemplateResponse("posts/list.html", context, headers={"Vary": "Cookie"})
+    http_cache.set_validators(response, etag, None)
+    return page_cache.store_page(request, current_user, response, tags=[page_cache.LISTING_PAGES])
 
 @router.get("/posts/new", response_class=HTMLResponse, name="create_post_page_get")
 async def create_post_page_get(
@@ -97,25 +120,30 @@ async def create_post_page_get(
     )
 
 @router.post("/posts/new", name="handle_create_post_form")
-async def handle_create_post_form(
+def handle_create_post_form(
     request: Request,
     session: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
     title: str = Form(...),
     content: str = Form(...),
     featured_image_file: Optional[UploadFile] = File(None),
+    featured_image_key: Optional[str] = Form(None),
     tags_str: Optional[str] = Form(None)
 ):
     tag_names_list: Optional[List[str]] = None
     if tags_str:
         tag_names_list = [tag.strip().lower() for tag in tags_str.split(',') if tag.strip()]
 
-    saved_image_path: Optional[str] = None
+    saved_image = None
     form_error_message: Optional[str] = None
 
-    if featured_image_file and featured_image_file.filename:
-        saved_image_path = await save_upload_file(featured_image_file, max_size_mb=2)
-        if not saved_image_path:
+    if featured_image_key or (featured_image_file and featured_image_file.filename):
+        if featured_image_key:
+            # Ảnh đã được trình duyệt upload thẳng lên storage (xem static/js/direct-upload.js)
+            saved_image = save_incoming_image(session, featured_image_key, max_size_mb=2)
+        else:
+            saved_image = save_upload_image(session, featured_image_file, max_size_mb=2)
+        if not saved_image:
             form_error_message = "Upload ảnh đại diện thất bại. Ảnh phải là JPG, PNG, GIF, WEBP và nhỏ hơn 2MB."
             return templates.TemplateResponse(
                 "posts/create_post.html",
@@ -138,13 +166,16 @@ async def handle_create_post_form(
         "content": content,
         "tags": tag_names_list,
     }
-    if saved_image_path:
-        post_in_data["featured_image_url"] = saved_image_path 
+    if saved_image:
+        post_in_data["featured_image_url"] = saved_image.path
     
     post_in = PostCreateSchema(**post_in_data)
 
     try:
-        new_post = crud_post.create_db_post(session=session, post_in=post_in, owner_id=current_user.id)
+        new_post = crud_post.create_db_post(
+            session=session, post_in=post_in, owner_id=current_user.id,
+            featured_image_variants=saved_image.variants if saved_image else None
+        )
         add_flash_message(request, "success", "Bài viết đã được tạo thành công!")
         return RedirectResponse(
             url=request.url_for('read_single_post_page', post_id=new_post.id),
@@ -152,6 +183,10 @@ async def handle_create_post_form(
         )
     except Exception as e:
         print(f"Error creating post: {e}")
+        if saved_image:
+            # Tham chiếu ảnh đã được commit trước khi tạo bài: trả lại để file không bị giữ mãi.
+            session.rollback()
+            release_upload(session, saved_image.path, saved_image.variants)
         add_flash_message(request, "danger", "Có lỗi xảy ra khi tạo bài viết. Vui lòng thử lại.")
         return templates.TemplateResponse(
             "posts/create_post.html",
@@ -172,14 +207,28 @@ async def handle_create_post_form(
 @router.get("/posts/{post_id}", response_class=HTMLResponse, name="read_single_post_page")
 async def read_single_post_page_frontend(
     request: Request, post_id: int,
-    session: Session = Depends(deps.get_db),
+    session: AsyncSession = Depends(deps.get_async_db),
     current_user: Optional[User] = Depends(deps.get_optional_current_user)
 ):
-    db_post = crud_post.get_db_post(session=session, post_id=post_id)
+    cached_response = page_cache.get_cached_page(request, current_user)
+    if cached_response is not None:
+        return cached_response
+
+    validators = await aio.crud_post.get_db_post_validators(session, post_id)
+    if validators is None:
+        raise HTTPException(status_code=404, detail="Bài viết không tồn tại")
+    updated_at, comment_count = validators
+    etag = http_cache.make_etag("post-page", post_id, current_user.id if current_user else None, updated_at, comment_count)
+    if not request.session.get("flash_messages") and http_cache.is_not_modified(request, etag, updated_at):
+        return http_cache.not_modified_response(etag, updated_at, headers={"Vary": "Cookie"})
+
+    db_post = await aio.crud_post.get_db_post(session=session, post_id=post_id, options=crud_post.POST_LOAD_LIST)
     if not db_post:
         raise HTTPException(status_code=404, detail="Bài viết không tồn tại")
 
-    comments = crud_comment.get_db_comments_for_post(session=session, post_id=post_id, limit=50)
+    comments = await aio.crud_comment.get_db_comments_for_post(
+        session=session, post_id=post_id, limit=50, options=crud_comment.COMMENT_LOAD_WITH_OWNER
+    )
 
     login_base_url = request.url_for('login_page_get')
     redirect_target_url = str(request.url_for('read_single_post_page', post_id=post_id)) + "#comments_section"
@@ -190,11 +239,13 @@ async def read_single_post_page_frontend(
         "login_base_url": login_base_url,
         "redirect_target_url": redirect_target_url
     }
-    return templates.TemplateResponse("posts/detail.html", context)
+    response = templates.TemplateResponse("posts/detail.html", context, headers={"Vary": "Cookie"})
+    http_cache.set_validators(response, etag, updated_at)
+    return page_cache.store_page(request, current_user, response, tags=[page_cache.post_pages(post_id)])
 
 
 @router.post("/posts/{post_id}/comments", name="handle_create_comment_form")
-async def handle_create_comment_form(
+def handle_create_comment_form(
     request: Request,
     post_id: int,
     session: Session = Depends(deps.get_db),
@@ -243,17 +294,17 @@ async def login_page_get(
 @router.post("/login", name="handle_login_form")
 async def handle_login_form(
     request: Request,
-    session: Session = Depends(deps.get_db),
+    session: AsyncSession = Depends(deps.get_async_db),
     username: str = Form(...),
     password: str = Form(...),
     next_url: Optional[str] = Query(None)
 ):
-    user = crud_user.get_user_by_username(session, username=username)
+    user = await aio.crud_user.get_user_by_username(session, username=username)
     error_redirect_params = {}
     if next_url:
         error_redirect_params["next"] = next_url
 
-    if not user or not security.verify_password(password, user.hashed_password): 
+    if not user or not await security.verify_password_async(password, user.hashed_password): 
         error_redirect_params["error_message"] = "Tên đăng nhập hoặc mật khẩu không chính xác."
         login_url_with_error = request.url_for('login_page_get').include_query_params(**error_redirect_params)
         return RedirectResponse(url=str(login_url_with_error), status_code=status.HTTP_302_FOUND)
@@ -263,7 +314,7 @@ async def handle_login_form(
         login_url_with_error = request.url_for('login_page_get').include_query_params(**error_redirect_params)
         return RedirectResponse(url=str(login_url_with_error), status_code=status.HTTP_302_FOUND)
 
-    access_token_str = security.create_access_token(data={"sub": user.username}) 
+    access_token_str = security.create_access_token(data=security.access_token_claims(user)) 
 
     redirect_target_str = next_url
     if not redirect_target_str or not redirect_target_str.startswith("/"):
@@ -305,7 +356,7 @@ async def register_page_get(
     )
 
 @router.post("/register", name="handle_register_form")
-async def handle_register_form(
+def handle_register_form(
     request: Request,
     session: Session = Depends(deps.get_db),
     username: str = Form(...),
@@ -384,7 +435,8 @@ async def handle_register_form(
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    crud_user.create_db_user(session=session, user_in=user_in_schema)
+    hashed_password = security.get_password_hash_in_pool(user_in_schema.password)
+    crud_user.create_db_user(session=session, user_in=user_in_schema, hashed_password=hashed_password)
 
     login_url_with_success = request.url_for('login_page_get').include_query_params(success_message="Đăng ký thành công! Vui lòng đăng nhập.")
     return RedirectResponse(
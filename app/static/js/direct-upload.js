@@ -0,0 +1,60 @@
+// Upload ảnh đại diện thẳng lên storage (S3) bằng presigned POST, form chỉ gửi key về server.
+// Nếu không lấy được presigned URL (ví dụ backend local trả 501) thì giữ nguyên upload qua form.
+document.addEventListener('DOMContentLoaded', () => {
+    const fileInput = document.querySelector('input[type="file"][data-presign-url]');
+    if (!fileInput) {
+        return;
+    }
+    const form = fileInput.form;
+    const keyInput = form.querySelector('input[name="featured_image_key"]');
+    const submitButton = form.querySelector('button[type="submit"]');
+    const statusText = document.getElementById(fileInput.id + '_status');
+
+    const setStatus = (message) => {
+        if (statusText) {
+            statusText.textContent = message;
+        }
+    };
+
+    fileInput.addEventListener('change', async () => {
+        keyInput.value = '';
+        fileInput.name = 'featured_image_file';
+        const file = fileInput.files[0];
+        if (!file) {
+            return;
+        }
+
+        submitButton.disabled = true;
+        setStatus('Đang upload ảnh...');
+        try {
+            const presignResponse = await fetch(fileInput.dataset.presignUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                credentials: 'same-origin',
+                body: JSON.stringify({ filename: file.name, content_type: file.type, size_bytes: file.size }),
+            });
+            if (!presignResponse.ok) {
+                setStatus('');
+                return; // Dùng upload qua form như bình thường
+            }
+            const presigned = await presignResponse.json();
+
+            const uploadData = new FormData();
+            Object.entries(presigned.fields).forEach(([name, value]) => uploadData.append(name, value));
+            uploadData.append('file', file); // Field "file" phải đứng cuối
+            const uploadResponse = await fetch(presigned.url, { method: 'POST', body: uploadData });
+            if (!uploadResponse.ok) {
+                setStatus('Upload trực tiếp thất bại, ảnh sẽ được gửi cùng form.');
+                return;
+            }
+
+            keyInput.value = presigned.key;
+            fileInput.removeAttribute('name'); // Không gửi lại file qua app server
+            setStatus('Đã upload ảnh.');
+        } catch (error) {
+            setStatus('Upload trực tiếp thất bại, ảnh sẽ được gửi cùng form.');
+        } finally {
+            submitButton.disabled = false;
+        }
+    });
+});
@@ -1,8 +1,15 @@
+import hashlib
+import os
 import pathlib
-import shutil
+import tempfile
 import uuid
 from fastapi import UploadFile
-from typing import Optional
+from sqlmodel import Session
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+from app.crud import crud_upload
+from app.core.storage import get_storage_backend
+from app.utils.image_processing import InvalidImageError, process_image_in_pool
 
 # Đường dẫn gốc của ứng dụng (thư mục chứa thư mục 'app')
 # Giả sử file này nằm trong app/utils/file_upload.py
@@ -19,114 +26,278 @@ APP_ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent # trỏ đến th
 STATIC_DIR = APP_ROOT_DIR / "static"
 UPLOAD_DIR_IMAGES = STATIC_DIR / "uploads" / "images"
 
-# Tạo thư mục nếu chưa tồn tại
+# Tạo thư mục nếu chưa tồn tại (backend local)
 UPLOAD_DIR_IMAGES.mkdir(parents=True, exist_ok=True)
 
+# Key trong storage backend (xem app/core/storage.py), cũng là giá trị lưu trong database.
+UPLOAD_PREFIX_IMAGES = "uploads/images"
+# Trình duyệt upload trực tiếp (presigned) vào đây; app xử lý rồi xóa file khỏi prefix này.
+UPLOAD_PREFIX_INCOMING = "uploads/incoming"
+
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Các hàm dưới đây đều là hàm sync (I/O đĩa, storage, xử lý ảnh, database): gọi từ route handler `def`,
+# Starlette chạy chúng trong threadpool nên event loop không bị chặn.
 
 def get_file_extension(filename: str) -> Optional[str]:
     if '.' in filename:
         return filename.rsplit('.', 1)[1].lower()
     return None
 
-async def save_upload_file(
-    upload_file: UploadFile,
-    destination_dir: pathlib.Path = UPLOAD_DIR_IMAGES,
-    max_size_mb: Optional[float] = 5  # Giới hạn kích thước file là 5MB
-) -> Optional[str]:
+def content_prefix(digest: str, prefix: str = UPLOAD_PREFIX_IMAGES) -> str:
+    """Prefix chia shard theo hash (ab/cd/) để không dồn hàng trăm nghìn file vào một thư mục."""
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}"
+
+def _stream_to_temp_file(source: BinaryIO, max_bytes: Optional[int]) -> Optional[Tuple[pathlib.Path, str, int]]:
     """
-    Lưu file được upload, kiểm tra extension và kích thước.
-    Trả về đường dẫn tương đối (tính từ thư mục static) nếu thành công, None nếu thất bại.
+    Chép `source` vào file tạm cục bộ theo từng chunk, tính SHA-256 trong lúc ghi.
+    Dừng ngay và trả về None khi vượt `max_bytes`; ngược lại trả về (file tạm, hash, số byte).
     """
+    source.seek(0)
+    digest = hashlib.sha256()
+    temp_fd, temp_name = tempfile.mkstemp(prefix="upload-", suffix=".part")
+    try:
+        written = 0
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    os.unlink(temp_name)
+                    return None
+                digest.update(chunk)
+                temp_file.write(chunk)
+        return pathlib.Path(temp_name), digest.hexdigest(), written
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+def _download_to_temp_file(key: str, max_bytes: Optional[int]) -> Optional[Tuple[pathlib.Path, str, int]]:
+    """Tải file từ storage (upload trực tiếp) về file tạm; cùng kết quả với _stream_to_temp_file."""
+    storage = get_storage_backend()
+    # Kiểm tra kích thước trước khi tải: không tải về cả object lớn chỉ để từ chối nó.
+    if max_bytes is not None and storage.size(key) > max_bytes:
+        return None
+    temp_fd, temp_name = tempfile.mkstemp(prefix="upload-", suffix=".part")
+    os.close(temp_fd)
+    try:
+        storage.download(key, pathlib.Path(temp_name))
+        with open(temp_name, "rb") as downloaded:
+            return _stream_to_temp_file(downloaded, max_bytes)
+    finally:
+        os.unlink(temp_name)
+
+def _unlink_quietly(path: pathlib.Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+def _receive_upload(
+    upload_file: UploadFile,
+    max_size_mb: Optional[float]
+) -> Optional[Tuple[pathlib.Path, str, int, str]]:
+    """Kiểm tra extension/kích thước rồi ghi vào file tạm; trả về (file tạm, hash, số byte, extension)."""
     if not upload_file.filename:
         return None
 
     extension = get_file_extension(upload_file.filename)
     if not extension or extension not in ALLOWED_EXTENSIONS:
-        # Có thể raise HTTPException ở đây hoặc trả về None để route handler xử lý
+        # Trả về None để route handler xử lý
         print(f"File extension not allowed: {extension}")
+        upload_file.file.close()
+        return None
+
+    max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+    # UploadFile.size (nếu có) chỉ để từ chối sớm; giới hạn thật được kiểm tra khi ghi từng chunk.
+    if max_bytes is not None and upload_file.size is not None and upload_file.size > max_bytes:
+        print(f"File too large: {upload_file.size / (1024*1024):.2f}MB. Max is {max_size_mb}MB.")
+        upload_file.file.close()
         return None
 
-    # Kiểm tra kích thước file (xấp xỉ)
-    if max_size_mb:
-        # Đọc nội dung file để kiểm tra kích thước chính xác hơn
-        # upload_file.file.seek(0, 2) # Di chuyển con trỏ đến cuối file
-        # file_size = upload_file.file.tell() # Lấy vị trí hiện tại (kích thước)
-        # upload_file.file.seek(0) # Đưa con trỏ về đầu file để đọc sau này
-        # if file_size > max_size_mb * 1024 * 1024:
-        #     print(f"File too large: {file_size / (1024*1024):.2f}MB")
-        #     return None
-        # Cách đơn giản hơn, dựa vào content_length nếu có, nhưng không hoàn toàn đáng tin cậy
-        # Đối với kiểm tra kích thước chính xác, cần đọc toàn bộ file vào memory hoặc stream và đếm.
-        # FastAPI UploadFile.size có sẵn (từ Starlette 0.20.0+)
-        if hasattr(upload_file, 'size') and upload_file.size is not None:
-             if upload_file.size > max_size_mb * 1024 * 1024:
-                print(f"File too large: {upload_file.size / (1024*1024):.2f}MB. Max is {max_size_mb}MB.")
-                return None
-        else: # Fallback nếu không có `size` attribute (phiên bản cũ hơn hoặc bug)
-            # Cần đọc file để kiểm tra, có thể tốn tài nguyên
-            contents = await upload_file.read()
-            if len(contents) > max_size_mb * 1024 * 1024:
-                print(f"File too large (read): {len(contents) / (1024*1024):.2f}MB. Max is {max_size_mb}MB.")
-                await upload_file.seek(0) # Quan trọng: đưa con trỏ về đầu để đọc lại khi lưu
-                return None
-            await upload_file.seek(0) # Quan trọng: đưa con trỏ về đầu để đọc lại khi lưu
-
-    # Tạo tên file duy nhất để tránh ghi đè
-    # filename = f"{uuid.uuid4().hex}.{extension}"
-    # Hoặc giữ lại một phần tên gốc cho dễ nhận biết (cần sanitize)
-    original_stem = pathlib.Path(upload_file.filename).stem
-    sanitized_stem = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in original_stem)
-    unique_id = uuid.uuid4().hex[:8] # Thêm uuid ngắn
-    filename = f"{sanitized_stem}_{unique_id}.{extension}"
-
-    file_path = destination_dir / filename
-    
     try:
-        with open(file_path, "wb") as buffer:
-            # Nếu đã đọc ở trên để kiểm tra size, cần ghi contents
-            if 'contents' in locals():
-                buffer.write(contents)
-            else: # Nếu chưa đọc, thì stream vào
-                shutil.copyfileobj(upload_file.file, buffer)
+        received = _stream_to_temp_file(upload_file.file, max_bytes)
     except Exception as e:
         print(f"Error saving file: {e}")
         return None
     finally:
-        await upload_file.close() # Luôn đóng file
+        upload_file.file.close() # Luôn đóng file
+    if received is None:
+        print(f"File too large: more than {max_size_mb}MB.")
+        return None
+    temp_path, digest, size_bytes = received
+    return temp_path, digest, size_bytes, extension
+
+def save_upload_file(
+    upload_file: UploadFile,
+    prefix: str = UPLOAD_PREFIX_IMAGES,
+    max_size_mb: Optional[float] = 5  # Giới hạn kích thước file là 5MB
+) -> Optional[str]:
+    """
+    Lưu file được upload theo nội dung: `<prefix>/<ab>/<cd>/<sha256>.<ext>` trong storage backend,
+    nên cùng một file upload nhiều lần chỉ chiếm chỗ một lần và URL không bao giờ đổi nội dung.
+    Trả về key (đường dẫn tương đối, dùng với media_url) nếu thành công, None nếu thất bại.
+    Ảnh nên dùng save_upload_image (có xử lý ảnh và đếm tham chiếu).
+    """
+    received = _receive_upload(upload_file, max_size_mb)
+    if received is None:
+        return None
+    temp_path, digest, _, extension = received
 
-    # Trả về đường dẫn tương đối tính từ thư mục STATIC_DIR để dùng với url_for('static', path=...)
-    # Ví dụ: UPLOAD_DIR_IMAGES = /app/static/uploads/images
-    # STATIC_DIR = /app/static
-    # file_path.relative_to(STATIC_DIR) sẽ là uploads/images/filename.ext
+    key = f"{content_prefix(digest, prefix)}/{digest}.{extension}"
     try:
-        relative_path = file_path.relative_to(STATIC_DIR)
-        # Đảm bảo dùng / làm dấu phân cách path cho URL
-        return str(relative_path).replace("\\", "/")
-    except ValueError:
-        # Trường hợp destination_dir không nằm trong STATIC_DIR (không nên xảy ra với cấu hình hiện tại)
-        print("Error: Upload destination is not relative to static directory.")
+        get_storage_backend().save(temp_path, key)
+    except Exception as e:
+        print(f"Error saving file: {e}")
         return None
+    finally:
+        _unlink_quietly(temp_path)
+    return key
 
-async def delete_static_file(relative_path: Optional[str]):
+def delete_static_file(relative_path: Optional[str]):
     """
-    Xóa file tĩnh dựa trên đường dẫn tương đối từ thư mục static.
+    Xóa file upload theo key (đường dẫn tương đối) khỏi storage backend.
     """
     if not relative_path:
         return False
-    
-    # Chuyển đổi / thành dấu phân cách hệ thống nếu cần (Windows)
-    # Tuy nhiên, pathlib thường xử lý tốt
-    file_to_delete = STATIC_DIR / relative_path 
-    
+
     try:
-        if file_to_delete.is_file():
-            file_to_delete.unlink()
-            print(f"Deleted static file: {file_to_delete}")
-            return True
+        deleted = get_storage_backend().delete(relative_path)
+        if deleted:
+            print(f"Deleted static file: {relative_path}")
         else:
-            print(f"File not found for deletion: {file_to_delete}")
-            return False
+            print(f"File not found for deletion: {relative_path}")
+        return deleted
     except Exception as e:
-        print(f"Error deleting static file {file_to_delete}: {e}")
-        return False
\ No newline at end of file
+        print(f"Error deleting static file {relative_path}: {e}")
+        return False
+
+
+class SavedImage(NamedTuple):
+    path: str  # Biến thể lớn nhất, dùng làm featured_image_url/profile_picture_url
+    variants: Dict[str, dict]
+
+def _store_image(
+    session: Session,
+    temp_path: pathlib.Path,
+    digest: str,
+    size_bytes: int,
+    profile: str,
+    prefix: str
+) -> Optional[SavedImage]:
+    key = f"{digest}:{profile}"
+    existing = crud_upload.acquire_db_upload(session, key=key)
+    if existing:
+        return SavedImage(path=existing.path, variants=existing.variants)
+
+    storage = get_storage_backend()
+    shard_prefix = content_prefix(digest, prefix)
+    with tempfile.TemporaryDirectory(prefix="upload-variants-") as work_dir:
+        try:
+            variants = process_image_in_pool(temp_path, pathlib.Path(work_dir) / f"{digest}_{profile}", profile)
+        except InvalidImageError as e:
+            print(f"Invalid image upload {digest}: {e}")
+            return None
+        for variant in variants.values():
+            for variant_key in ("path", "webp", "avif"):
+                if variant_key in variant:
+                    file_name = variant[variant_key]
+                    variant[variant_key] = f"{shard_prefix}/{file_name}"
+                    storage.save(pathlib.Path(work_dir) / file_name, variant[variant_key])
+    largest = max(variants.values(), key=lambda variant: variant["width"])
+
+    db_upload = crud_upload.create_db_upload(
+        session, key=key, path=largest["path"], variants=variants, size_bytes=size_bytes
+    )
+    return SavedImage(path=db_upload.path, variants=db_upload.variants)
+
+def save_upload_image(
+    session: Session,
+    upload_file: UploadFile,
+    profile: str = "post",
+    prefix: str = UPLOAD_PREFIX_IMAGES,
+    max_size_mb: Optional[float] = 5
+) -> Optional[SavedImage]:
+    """
+    Lưu ảnh upload: tạo các biến thể đã resize, bỏ EXIF theo `profile` (xem IMAGE_PROFILES).
+    Ảnh trùng nội dung với một ảnh đã lưu (cùng SHA-256 và profile) không được xử lý lại:
+    chỉ tăng ref_count trong bảng upload. Trả về None nếu không phải ảnh hợp lệ.
+    """
+    received = _receive_upload(upload_file, max_size_mb)
+    if received is None:
+        return None
+    temp_path, digest, size_bytes, _ = received
+    try:
+        return _store_image(session, temp_path, digest, size_bytes, profile, prefix)
+    finally:
+        _unlink_quietly(temp_path)
+
+def new_incoming_key(filename: str) -> Optional[str]:
+    """Key cho upload trực tiếp từ trình duyệt; None nếu extension không được phép."""
+    extension = get_file_extension(filename)
+    if not extension or extension not in ALLOWED_EXTENSIONS:
+        return None
+    return f"{UPLOAD_PREFIX_INCOMING}/{uuid.uuid4().hex}.{extension}"
+
+def save_incoming_image(
+    session: Session,
+    incoming_key: str,
+    profile: str = "post",
+    prefix: str = UPLOAD_PREFIX_IMAGES,
+    max_size_mb: Optional[float] = 5
+) -> Optional[SavedImage]:
+    """
+    Như save_upload_image nhưng cho ảnh trình duyệt đã upload thẳng lên storage (presigned URL):
+    request của form chỉ mang theo key. File trong prefix incoming luôn bị xóa sau khi xử lý.
+    """
+    if not incoming_key.startswith(f"{UPLOAD_PREFIX_INCOMING}/") or ".." in incoming_key:
+        return None
+    max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+    try:
+        received = _download_to_temp_file(incoming_key, max_bytes)
+    except Exception as e:
+        print(f"Error fetching direct upload {incoming_key}: {e}")
+        return None
+    finally:
+        delete_static_file(incoming_key)
+    if received is None:
+        print(f"Direct upload too large: more than {max_size_mb}MB.")
+        return None
+    temp_path, digest, size_bytes = received
+    try:
+        return _store_image(session, temp_path, digest, size_bytes, profile, prefix)
+    finally:
+        _unlink_quietly(temp_path)
+
+def delete_image_files(relative_path: Optional[str], variants: Optional[Dict[str, dict]] = None):
+    """Xóa ảnh đã upload cùng mọi biến thể; bỏ qua URL ngoài (http...)."""
+    paths = {relative_path} if relative_path else set()
+    for variant in (variants or {}).values():
+        paths.update(variant.get(key) for key in ("path", "webp", "avif"))
+    for path in paths:
+        if path and path.startswith("uploads/"):
+            delete_static_file(path)
+
+def acquire_upload(session: Session, relative_path: str) -> Optional[SavedImage]:
+    """
+    Thêm một tham chiếu tới ảnh đã upload khi client dùng lại path của nó (API);
+    None nếu path không có trong bảng upload (caller từ chối path đó).
+    """
+    db_upload = crud_upload.acquire_db_upload_by_path(session, path=relative_path)
+    if db_upload is None:
+        return None
+    return SavedImage(path=db_upload.path, variants=db_upload.variants)
+
+def release_upload(session: Session, relative_path: Optional[str], variants: Optional[Dict[str, dict]] = None):
+    """
+    Bỏ một tham chiếu tới ảnh đã upload; file chỉ bị xóa khi không còn bản ghi nào dùng ảnh.
+    File upload cũ (không có trong bảng upload) được xóa trực tiếp như trước.
+    """
+    if not relative_path or not relative_path.startswith("uploads/"):
+        return
+    released = crud_upload.release_db_upload(session, path=relative_path)
+    if released is None:
+        delete_image_files(relative_path, variants)
+    elif released.ref_count == 0:
+        delete_image_files(released.path, released.variants)
@@ -0,0 +1,133 @@
+import pathlib
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, ImageSequence, features
+
+from app.core.config import settings
+
+# Chiều rộng tối đa của từng biến thể; list.html dùng "card", detail.html dùng "full".
+POST_IMAGE_SIZES: Dict[str, int] = {"thumb": 320, "card": 800, "full": 1600}
+AVATAR_IMAGE_SIZES: Dict[str, int] = {"thumb": 320}
+# Profile xử lý ảnh: (các kích thước, có tạo bản WebP/AVIF hay không).
+IMAGE_PROFILES: Dict[str, Tuple[Dict[str, int], bool]] = {
+    "post": (POST_IMAGE_SIZES, True),
+    "avatar": (AVATAR_IMAGE_SIZES, False),
+}
+
+# Định dạng thật (đọc từ header khi decode), không tin vào extension của file upload.
+ALLOWED_IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "png", "WEBP": "webp"}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+
+class InvalidImageError(Exception):
+    """File upload không phải ảnh hợp lệ (hoặc quá lớn để xử lý)."""
+
+
+def _save_variant(image: Image.Image, path: pathlib.Path, image_format: str) -> None:
+    # Không truyền exif=... nên metadata (GPS, thông tin máy chụp) bị loại bỏ khỏi file đầu ra.
+    if image_format == "JPEG":
+        image.convert("RGB").save(path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif image_format == "PNG":
+        image.save(path, "PNG", optimize=True)
+    elif image_format == "WEBP":
+        image.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif image_format == "AVIF":
+        image.save(path, "AVIF", quality=AVIF_QUALITY)
+
+def process_image(source_path: str, output_stem: str, profile: str = "post") -> Dict[str, dict]:
+    """
+    Tạo các biến thể đã resize (và bản WebP/AVIF) tên `<output_stem>_<variant>.<ext>`,
+    `output_stem` là đường dẫn đầy đủ không có extension; file gốc không bị sửa hay xóa.
+    Chạy trong process pool: chỉ nhận/trả kiểu dữ liệu pickle được, đường dẫn trả về là tên file.
+
+    Trả về {"thumb": {"path": ..., "width": ..., "height": ..., "webp": ..., "avif": ...}, ...};
+    biến thể lớn hơn ảnh gốc được bỏ qua, trừ biến thể lớn nhất (luôn có).
+    """
+    sizes, modern_formats = IMAGE_PROFILES[profile]
+    source = pathlib.Path(source_path)
+    output = pathlib.Path(output_stem)
+    try:
+        with Image.open(source) as image:
+            image_format = image.format
+            if image_format not in ALLOWED_IMAGE_FORMATS:
+                raise InvalidImageError(f"Định dạng ảnh không được hỗ trợ: {image_format}")
+            if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+                raise InvalidImageError(f"Ảnh quá lớn: {image.width}x{image.height}")
+            if getattr(image, "is_animated", False):
+                # Ảnh động không resize. GIF không có EXIF nên được chép nguyên; WebP động có thể mang
+                # EXIF/XMP (cả GPS) nên được ghi lại từng frame mà không truyền exif/xmp.
+                if image_format == "GIF":
+                    copy_path = output.with_name(f"{output.name}.gif")
+                    shutil.copyfile(source, copy_path)
+                else:
+                    copy_path = output.with_name(f"{output.name}.{ALLOWED_IMAGE_FORMATS[image_format]}")
+                    frames, durations = [], []
+                    for frame in ImageSequence.Iterator(image):
+                        frame.load()
+                        durations.append(frame.info.get("duration", 0))
+                        frames.append(frame.copy())
+                    frames[0].save(
+                        copy_path, "WEBP", save_all=True, append_images=frames[1:], quality=WEBP_QUALITY,
+                        method=4, duration=durations, loop=image.info.get("loop", 0)
+                    )
+                return {
+                    max(sizes, key=sizes.get): {"path": copy_path.name, "width": image.width, "height": image.height}
+                }
+            image.load()
+            image = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(str(e)) from e
+
+    output_format = "PNG" if image_format == "GIF" else image_format
+    extension = ALLOWED_IMAGE_FORMATS[image_format]
+    write_webp = modern_formats and output_format != "WEBP"
+    write_avif = modern_formats and settings.IMAGE_AVIF_ENABLED and features.check("avif")
+
+    variants: Dict[str, dict] = {}
+    largest = max(sizes, key=sizes.get)
+    for name, max_width in sorted(sizes.items(), key=lambda item: item[1]):
+        if max_width >= image.width and name != largest:
+            continue
+        resized = image.copy()
+        resized.thumbnail((max_width, max_width * 4), Image.Resampling.LANCZOS)
+        variant_path = output.with_name(f"{output.name}_{name}.{extension}")
+        _save_variant(resized, variant_path, output_format)
+        variant = {"path": variant_path.name, "width": resized.width, "height": resized.height}
+        if write_webp:
+            webp_path = variant_path.with_suffix(".webp")
+            _save_variant(resized, webp_path, "WEBP")
+            variant["webp"] = webp_path.name
+        if write_avif:
+            avif_path = variant_path.with_suffix(".avif")
+            _save_variant(resized, avif_path, "AVIF")
+            variant["avif"] = avif_path.name
+        variants[name] = variant
+    return variants
+
+
+_image_executor: Optional[ProcessPoolExecutor] = None
+_image_executor_lock = threading.Lock()
+
+def _get_image_executor() -> ProcessPoolExecutor:
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is None:
+            _image_executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+        return _image_executor
+
+def process_image_in_pool(source_path: pathlib.Path, output_stem: pathlib.Path, profile: str = "post") -> Dict[str, dict]:
+    # Decode/resize/encode tốn hàng trăm ms CPU mỗi ảnh: chạy ở process khác để không giữ GIL
+    # của worker (thread gọi hàm này chỉ chờ kết quả).
+    return _get_image_executor().submit(process_image, str(source_path), str(output_stem), profile).result()
+
+def shutdown_image_executor() -> None:
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is not None:
+            _image_executor.shutdown(wait=False)
+            _image_executor = None
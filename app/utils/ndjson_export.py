@@ -0,0 +1,46 @@
+import datetime
+import json
+import zlib
+from typing import Iterator
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.crud import crud_export
+
+# Gom nhiều dòng NDJSON thành một chunk trước khi gửi/ghi để giảm số lần write.
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Không serialize được {type(value).__name__}")
+
+def iter_ndjson(kind: str, compress: bool = False, **filters) -> Iterator[bytes]:
+    """
+    Sinh nội dung NDJSON (hoặc gzip của nó) theo từng chunk, bộ nhớ không phụ thuộc số dòng.
+    Tự mở Session riêng: generator chạy sau khi route handler đã trả về (StreamingResponse),
+    lúc đó session của dependency get_db đã đóng.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: định dạng gzip
+    buffer = bytearray()
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    with Session(engine) as session:
+        for record in crud_export.iter_export_records(session, kind, **filters):
+            buffer += json.dumps(record, ensure_ascii=False, default=_json_default).encode("utf-8")
+            buffer += b"\n"
+            if len(buffer) >= CHUNK_SIZE:
+                chunk = emit(bytes(buffer))
+                buffer.clear()
+                if chunk:
+                    yield chunk
+
+    tail = emit(bytes(buffer))
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
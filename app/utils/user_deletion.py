@@ -0,0 +1,22 @@
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.crud import crud_user, crud_job
+
+
+def user_deletion_job_id(user_id: int) -> str:
+    return f"delete-user-{user_id}"
+
+def run_user_deletion_job(user_id: int, job_id: str) -> None:
+    """
+    Chạy trong BackgroundTasks sau khi response đã gửi đi nên tự mở Session riêng
+    (session của dependency get_db đã đóng). Hàm sync: Starlette chạy nó trong threadpool.
+    """
+    with Session(engine) as session:
+        try:
+            crud_user.delete_db_user_in_batches(session=session, user_id=user_id, job_id=job_id)
+            crud_job.finish_job(session, job_id=job_id)
+        except Exception as e:
+            print(f"Background deletion of user {user_id} failed: {e}")
+            session.rollback()
+            crud_job.fail_job(session, job_id=job_id, error=str(e))
@@ -0,0 +1,24 @@
+import sys
+import os
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from sqlmodel import Session
+import app.main  # noqa: F401 - đăng ký đầy đủ các model và relationship
+from app.db.session import engine
+from app.crud import crud_post
+
+def backfill_post_counts():
+    print("--- Tính lại comment_count và tag_count của bài viết ---")
+    with Session(engine) as session:
+        try:
+            crud_post.recount_db_post_counters(session)
+            print("Hoàn tất.")
+        except Exception as e:
+            session.rollback()
+            print(f"Lỗi khi tính lại số đếm: {e}")
+
+if __name__ == "__main__":
+    backfill_post_counts()
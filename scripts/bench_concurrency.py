@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+try:
+    import httpx
+except ImportError:
+    raise SystemExit("Cần cài httpx để chạy benchmark: pip install httpx")
+
+
+async def worker(client: "httpx.AsyncClient", paths, deadline: float, latencies: list, errors: list):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(base_url: str, paths, concurrency: int, duration: float):
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warmup: compile template, mở connection pool.
+        for path in paths:
+            await client.get(path)
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            worker(client, paths, deadline, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print(f"Không có request nào thành công ({len(errors)} lỗi).")
+        return
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"Paths: {', '.join(paths)}")
+    print(f"Concurrency: {concurrency}, thời gian: {elapsed:.1f}s")
+    print(f"Requests: {len(latencies)} OK, {len(errors)} lỗi")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency: p50 {p50:.1f}ms, p99 {p99:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Đo requests/sec của server đang chạy với N client đồng thời.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Có thể truyền nhiều lần. Mặc định: / và /posts/1")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base_url, args.paths or ["/", "/posts/1"], args.concurrency, args.duration))
@@ -0,0 +1,20 @@
+import sys
+import os
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from app.core import static_assets
+
+def build_static_assets():
+    print("--- Tạo CSS/JS có hash trong tên và bản nén .gz/.br ---")
+    if static_assets.brotli is None:
+        print("Chưa cài brotli: chỉ tạo bản .gz (pip install brotli).")
+    manifest = static_assets.build_static_assets()
+    for source, built in manifest.items():
+        print(f"{source} -> {built}")
+    print(f"Đã ghi manifest: {static_assets.MANIFEST_PATH}")
+
+if __name__ == "__main__":
+    build_static_assets()
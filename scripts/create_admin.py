@@ -1,4 +1,3 @@
-import asyncio
 import sys
 import os
 from getpass import getpass
@@ -10,8 +9,8 @@ sys.path.append(PROJECT_ROOT)
 from sqlmodel import Session
 from app.db.session import engine
 from app.models.user_models import User, UserCreate
-from app.core.security import get_password_hash
-from app.crud import crud_user
+from app.core.security import get_password_hash_in_pool, shutdown_password_executor
+from app.crud import crud_user, crud_count
 
 def create_admin_user_sync():
 
@@ -53,7 +52,8 @@ def create_admin_user_sync():
             print(f"Lỗi: Email '{email}' đã được đăng ký.")
             return
 
-        hashed_password = get_password_hash(password)
+        hashed_password = get_password_hash_in_pool(password)
+        shutdown_password_executor()
         admin_user = User(
             username=username,
             email=email,
@@ -65,6 +65,7 @@ def create_admin_user_sync():
         
         try:
             session.add(admin_user)
+            crud_count.change_counters(session, {crud_count.USERS_TOTAL: 1})
             session.commit()
             session.refresh(admin_user)
             print(f"Tạo tài khoản admin '{admin_user.username}' thành công!")
@@ -0,0 +1,48 @@
+import argparse
+import datetime
+import os
+import sys
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from sqlmodel import Session
+import app.main  # noqa: F401 - đăng ký đầy đủ các model và relationship
+from app.db.session import engine
+from app.crud import crud_user
+from app.crud.crud_export import EXPORT_KINDS
+from app.utils.ndjson_export import iter_ndjson
+
+def export_ndjson(kind: str, output, compress: bool, created_from, created_to, author, tag):
+    author_id = None
+    if author:
+        with Session(engine) as session:
+            author_user = crud_user.get_user_by_username(session=session, username=author)
+        if not author_user:
+            print(f"Lỗi: không tìm thấy user '{author}'.", file=sys.stderr)
+            sys.exit(1)
+        author_id = author_user.id
+
+    for chunk in iter_ndjson(
+        kind, compress=compress,
+        created_from=created_from, created_to=created_to, author_id=author_id, tag=tag
+    ):
+        output.write(chunk)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export posts/comments/users ra NDJSON với bộ nhớ không đổi (dùng cho backup hằng đêm).")
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("-o", "--output", help="File đích (mặc định: stdout)")
+    parser.add_argument("--gzip", action="store_true", help="Nén gzip")
+    parser.add_argument("--from", dest="created_from", type=datetime.date.fromisoformat, help="Từ ngày YYYY-MM-DD")
+    parser.add_argument("--to", dest="created_to", type=datetime.date.fromisoformat, help="Đến hết ngày YYYY-MM-DD")
+    parser.add_argument("--author", help="Username tác giả")
+    parser.add_argument("--tag", help="Tên tag")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            export_ndjson(args.kind, f, args.gzip, args.created_from, args.created_to, args.author, args.tag)
+    else:
+        export_ndjson(args.kind, sys.stdout.buffer, args.gzip, args.created_from, args.created_to, args.author, args.tag)
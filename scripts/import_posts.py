@@ -0,0 +1,210 @@
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import sys
+import time
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from sqlmodel import Session, select
+import app.main  # noqa: F401 - đăng ký đầy đủ các model và relationship
+from app.db.session import engine
+from app.crud import crud_post
+from app.models.user_models import User
+
+# Định dạng đầu vào:
+# - File JSONL, mỗi dòng một bài viết:
+#   {"title": "...", "content": "...", "author": "username", "tags": ["a", "b"],
+#    "created_at": "2024-01-31T08:00:00", "featured_image_url": "...",
+#    "comments": [{"author": "username", "text": "...", "created_at": "..."}]}
+# - Thư mục các file .md có front matter (title, author, tags, created_at, featured_image_url)
+#   nằm giữa hai dòng '---'; phần còn lại là content. Thiếu title thì dùng tên file.
+
+
+def _parse_front_matter_value(value: str):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [item.strip().strip("'\"") for item in value[1:-1].split(",") if item.strip()]
+    return value.strip("'\"")
+
+def parse_front_matter(text: str):
+    if not text.startswith("---"):
+        return {}, text
+    lines = text.splitlines()
+    meta = {}
+    current_list_key = None
+    for index, line in enumerate(lines[1:], start=1):
+        if line.strip() == "---":
+            return meta, "\n".join(lines[index + 1:]).lstrip("\n")
+        if current_list_key and line.lstrip().startswith("- "):
+            meta[current_list_key].append(_parse_front_matter_value(line.lstrip()[2:]))
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip()
+        if value.strip():
+            meta[key] = _parse_front_matter_value(value)
+            current_list_key = None
+        else:
+            meta[key] = []
+            current_list_key = key
+    return {}, text
+
+def iter_jsonl(path: pathlib.Path):
+    with path.open("r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if line:
+                yield line_number, json.loads(line)
+
+def iter_markdown_dir(path: pathlib.Path):
+    for index, file_path in enumerate(sorted(path.rglob("*.md")), start=1):
+        meta, body = parse_front_matter(file_path.read_text(encoding="utf-8"))
+        if isinstance(meta.get("tags"), str):
+            meta["tags"] = [tag for tag in meta["tags"].split(",")]
+        meta.setdefault("title", file_path.stem)
+        meta["content"] = body
+        yield index, meta
+
+def iter_records(source: pathlib.Path):
+    """Sinh (vị trí, record); vị trí tăng dần và được ghi vào checkpoint để chạy tiếp."""
+    if source.is_dir():
+        return iter_markdown_dir(source)
+    return iter_jsonl(source)
+
+def parse_datetime(value):
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(str(value))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def load_checkpoint(path: pathlib.Path) -> int:
+    if not path.exists():
+        return 0
+    return int(json.loads(path.read_text(encoding="utf-8"))["position"])
+
+def save_checkpoint(path: pathlib.Path, position: int) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"position": position}), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class UserResolver:
+    """Đổi username sang id theo lô, nhớ kết quả cho các lô sau."""
+
+    def __init__(self, default_owner_id):
+        self.default_owner_id = default_owner_id
+        self.ids_by_username = {}
+
+    def load(self, session: Session, usernames) -> None:
+        missing = {name for name in usernames if name and name not in self.ids_by_username}
+        if not missing:
+            return
+        for user_id, username in session.exec(select(User.id, User.username).where(User.username.in_(missing))).all():
+            self.ids_by_username[username] = user_id
+        for username in missing - self.ids_by_username.keys():
+            self.ids_by_username[username] = None
+
+    def get(self, username):
+        return self.ids_by_username.get(username) or self.default_owner_id
+
+
+def build_post(record: dict, users: UserResolver):
+    if not record.get("title") or not record.get("content"):
+        return None
+    comments = []
+    for comment in record.get("comments") or []:
+        owner_id = users.get(comment.get("author"))
+        if owner_id is None or not comment.get("text"):
+            continue
+        comments.append({
+            "text": comment["text"],
+            "owner_id": owner_id,
+            "created_at": parse_datetime(comment.get("created_at")),
+        })
+    return {
+        "title": record["title"],
+        "content": record["content"],
+        "featured_image_url": record.get("featured_image_url"),
+        "created_at": parse_datetime(record.get("created_at")),
+        "owner_id": users.get(record.get("author")),
+        "tags": record.get("tags") or [],
+        "comments": comments,
+    }
+
+def import_batch(session: Session, batch, users: UserResolver) -> int:
+    usernames = set()
+    for _, record in batch:
+        usernames.add(record.get("author"))
+        usernames.update(comment.get("author") for comment in record.get("comments") or [])
+    users.load(session, usernames)
+
+    posts = [post for post in (build_post(record, users) for _, record in batch) if post is not None]
+    crud_post.bulk_create_db_posts(session, posts)
+    session.commit()
+    return len(posts)
+
+
+def import_posts(source: pathlib.Path, batch_size: int, checkpoint_path: pathlib.Path, resume: bool, default_author):
+    start_after = load_checkpoint(checkpoint_path) if resume else 0
+    if start_after:
+        print(f"Tiếp tục từ checkpoint: bỏ qua các record tới vị trí {start_after}.")
+
+    imported = skipped = 0
+    started = time.perf_counter()
+    with Session(engine) as session:
+        default_owner_id = None
+        if default_author:
+            default_owner_id = session.exec(select(User.id).where(User.username == default_author)).first()
+            if default_owner_id is None:
+                print(f"Lỗi: không tìm thấy user '{default_author}'.")
+                return
+        users = UserResolver(default_owner_id)
+
+        def flush(batch):
+            nonlocal imported, skipped
+            try:
+                count = import_batch(session, batch, users)
+            except Exception as e:
+                session.rollback()
+                print(f"Lỗi khi nhập lô kết thúc ở vị trí {batch[-1][0]}: {e}")
+                raise
+            imported += count
+            skipped += len(batch) - count
+            save_checkpoint(checkpoint_path, batch[-1][0])
+            elapsed = time.perf_counter() - started
+            print(f"Đã nhập {imported} bài viết ({imported / elapsed:.0f} bài/s), bỏ qua {skipped} record không hợp lệ.")
+
+        batch = []
+        for position, record in iter_records(source):
+            if position <= start_after:
+                continue
+            batch.append((position, record))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    print(f"Hoàn tất: {imported} bài viết trong {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nhập bài viết hàng loạt từ file JSONL hoặc thư mục Markdown có front matter.")
+    parser.add_argument("source", type=pathlib.Path, help="File .jsonl hoặc thư mục chứa các file .md")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Số bài viết mỗi transaction (mặc định 1000)")
+    parser.add_argument("--default-author", help="Username dùng khi record không có hoặc có author không tồn tại")
+    parser.add_argument("--checkpoint", type=pathlib.Path, help="File checkpoint (mặc định <source>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Bỏ qua các record đã nhập theo checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or args.source.with_name(args.source.name + ".checkpoint.json")
+    import_posts(args.source, args.batch_size, checkpoint_path, args.resume, args.default_author)
@@ -0,0 +1,20 @@
+import sys
+import os
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from app.core.config import settings
+from app.core.templates import warm_templates
+
+def precompile_templates():
+    print("--- Biên dịch template Jinja vào bytecode cache ---")
+    if not settings.TEMPLATE_BYTECODE_CACHE_ENABLED:
+        print("TEMPLATE_BYTECODE_CACHE_ENABLED=false: không có gì để lưu.")
+        return
+    warm_templates()
+    print(f"Thư mục cache: {settings.TEMPLATE_BYTECODE_CACHE_DIR or '(thư mục tạm của hệ thống)'}")
+
+if __name__ == "__main__":
+    precompile_templates()
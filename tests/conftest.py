@@ -0,0 +1,44 @@
+import os
+import pathlib
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Settings đọc biến môi trường lúc import app: phải đặt trước mọi import từ app.
+_TEST_DIR = tempfile.mkdtemp(prefix="blog-tests-")
+TEST_DB_PATH = os.path.join(_TEST_DIR, "blog.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ["PAGE_CACHE_ENABLED"] = "false"
+os.environ["FRAGMENT_CACHE_ENABLED"] = "false"
+os.environ["STATIC_ASSETS_BUILD_ON_STARTUP"] = "false"
+os.environ["TEMPLATE_BYTECODE_CACHE_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    # Chạy migration thật (có trigger FTS) thay vì create_all.
+    from alembic import command
+    from alembic.config import Config
+
+    cwd = os.getcwd()
+    os.chdir(PROJECT_ROOT)
+    try:
+        config = Config(str(PROJECT_ROOT / "alembic.ini"))
+        config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+        command.upgrade(config, "head")
+    finally:
+        os.chdir(cwd)
+    return TEST_DB_PATH
+
+
+@pytest.fixture(scope="session")
+def client(migrated_db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
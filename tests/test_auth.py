@@ -0,0 +1,41 @@
+from sqlmodel import Session
+
+
+def _create_admin(username):
+    from app.db.session import engine
+    from app.crud import crud_user
+    from app.models.user_models import UserCreate
+
+    with Session(engine) as session:
+        user = crud_user.create_db_user(
+            session,
+            UserCreate(username=username, email=f"{username}@example.com", password="secret123"),
+            hashed_password="x",
+        )
+        user.is_admin = True
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        return user
+
+
+def test_revoked_admin_is_rejected_despite_user_cache(client):
+    from app.core import security
+    from app.crud import crud_user
+    from app.db.session import engine
+    from app.models.user_models import User
+
+    admin = _create_admin("cachedadmin")
+    headers = {"Authorization": f"Bearer {security.create_access_token(data=security.access_token_claims(admin))}"}
+
+    assert client.get("/admin/", headers=headers).status_code == 200
+    assert crud_user.user_cache.get(admin.username)["is_admin"] is True
+
+    # Thu hồi quyền mà không xóa user_cache, giống như thay đổi được thực hiện ở một worker khác.
+    with Session(engine) as session:
+        db_admin = session.get(User, admin.id)
+        db_admin.is_admin = False
+        session.add(db_admin)
+        session.commit()
+
+    assert client.get("/admin/", headers=headers).status_code == 403
@@ -0,0 +1,27 @@
+from app.core.cache import TaggedTTLCache
+
+
+def test_invalidate_tags_removes_only_tagged_entries():
+    cache = TaggedTTLCache(maxsize=10, ttl=60)
+    cache.set("home", "home page", tags=["posts"])
+    cache.set("post-1", "post 1", tags=["posts", "post:1"])
+    cache.set("post-2", "post 2", tags=["post:2"])
+
+    cache.invalidate_tags("post:1")
+    assert cache.get("post-1") is None
+    assert cache.get("home") == "home page"
+
+    cache.invalidate_tags("posts")
+    assert cache.get("home") is None
+    assert cache.get("post-2") == "post 2"
+
+
+def test_per_entry_ttl_and_clear():
+    cache = TaggedTTLCache(maxsize=10, ttl=60)
+    cache.set("expired", "x", tags=["t"], ttl=0)
+    cache.set("kept", "y", tags=["t"])
+    assert cache.get("expired") is None
+    assert cache.get("kept") == "y"
+
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,80 @@
+import datetime
+
+from sqlmodel import Session
+
+
+def _make_user(session, username):
+    from app.crud import crud_user
+    from app.models.user_models import UserCreate
+
+    return crud_user.create_db_user(
+        session,
+        UserCreate(username=username, email=f"{username}@example.com", password="secret123"),
+        hashed_password="x",
+    )
+
+
+def test_post_list_etag_changes_when_a_post_is_replaced(client):
+    # Xóa một bài rồi tạo bài khác với updated_at cũ hơn giữ nguyên cả COUNT lẫn max(updated_at).
+    from app.crud import crud_post
+    from app.db.session import engine
+    from app.models.post_models import PostCreate
+
+    with Session(engine) as session:
+        owner = _make_user(session, "etagowner")
+        newest = crud_post.create_db_post(session, post_in=PostCreate(title="Newest", content="a"), owner_id=owner.id)
+        replaced = crud_post.create_db_post(session, post_in=PostCreate(title="Old", content="b"), owner_id=owner.id)
+        replaced.updated_at = newest.updated_at - datetime.timedelta(days=1)
+        session.add(replaced)
+        session.commit()
+
+        etag = client.get("/api/v1/posts/").headers["etag"]
+        assert client.get("/api/v1/posts/", headers={"If-None-Match": etag}).status_code == 304
+
+        crud_post.delete_db_post(session, db_post=replaced)
+        replacement = crud_post.create_db_post(
+            session, post_in=PostCreate(title="Replacement", content="c"), owner_id=owner.id
+        )
+        replacement.updated_at = newest.updated_at - datetime.timedelta(days=1)
+        session.add(replacement)
+        session.commit()
+
+    response = client.get("/api/v1/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_post_detail_etag_changes_when_author_or_commenter_is_updated(client):
+    from app.crud import crud_comment, crud_post, crud_user
+    from app.db.session import engine
+    from app.models.comment_models import CommentCreate
+    from app.models.post_models import PostCreate
+    from app.models.user_models import UserUpdateByAdmin
+
+    with Session(engine) as session:
+        author = _make_user(session, "detailauthor")
+        commenter = _make_user(session, "detailcommenter")
+        post = crud_post.create_db_post(session, post_in=PostCreate(title="Detail", content="d"), owner_id=author.id)
+        crud_comment.create_db_comment(
+            session, comment_in=CommentCreate(text="hello"), post_id=post.id, owner_id=commenter.id
+        )
+
+        # Tác giả hiện trong cả API lẫn trang chi tiết; người bình luận chỉ hiện trên trang chi tiết.
+        for user, full_name in ((author, "Renamed Author"), (commenter, "Renamed Commenter")):
+            urls = (f"/api/v1/posts/{post.id}", f"/posts/{post.id}")
+            etags = {url: client.get(url).headers["etag"] for url in urls}
+            crud_user.update_user_by_admin(session, db_user=user, user_in=UserUpdateByAdmin(full_name=full_name))
+
+            for url, etag in etags.items():
+                response = client.get(url, headers={"If-None-Match": etag})
+                assert response.status_code == 200
+                assert response.headers["etag"] != etag
+
+
+def test_cursor_first_page_has_no_previous(client):
+    body = client.get("/api/v1/posts/", params={"after": "", "page_size": 1}).json()
+    assert body["has_previous"] is False
+    assert body["next_cursor"] is not None
+
+    body = client.get("/api/v1/posts/", params={"after": body["next_cursor"], "page_size": 1}).json()
+    assert body["has_previous"] is True
@@ -0,0 +1,29 @@
+from PIL import Image, ImageSequence
+
+
+def test_animated_webp_is_stripped_of_metadata_but_keeps_frames(tmp_path):
+    from app.utils.image_processing import process_image
+
+    frames = [Image.new("RGB", (64, 48), color) for color in ("red", "green", "blue")]
+    exif = Image.Exif()
+    exif[0x010F] = "CameraMaker"
+    source = tmp_path / "source.webp"
+    frames[0].save(
+        source, "WEBP", save_all=True, append_images=frames[1:], duration=[120, 80, 200], loop=3,
+        exif=exif.tobytes(), xmp=b"<x:xmpmeta>gps-location</x:xmpmeta>",
+    )
+
+    process_image(str(source), str(tmp_path / "out"), "post")
+
+    # Ảnh động không qua bước resize nhưng vẫn phải bỏ EXIF/XMP (có thể chứa toạ độ GPS).
+    output = tmp_path / "out.webp"
+    raw = output.read_bytes()
+    assert b"CameraMaker" not in raw
+    assert b"gps-location" not in raw
+    with Image.open(output) as image:
+        durations = []
+        for frame in ImageSequence.Iterator(image):
+            frame.load()
+            durations.append(frame.info.get("duration"))
+        assert durations == [120, 80, 200]
+        assert image.info.get("loop") == 3
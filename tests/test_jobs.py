@@ -0,0 +1,48 @@
+import datetime
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+
+def test_job_state_is_shared_through_the_database(migrated_db):
+    from app.crud import crud_job
+    from app.db.session import engine
+    from app.models.job_models import BackgroundJob
+
+    with Session(engine) as session:
+        job = crud_job.start_job(session, job_id="test-job", description="Test", total=10)
+        assert job is not None and job.is_running
+        assert crud_job.start_job(session, job_id="test-job", description="Test", total=10) is None
+        crud_job.advance_job(session, job_id="test-job", amount=4)
+        session.commit()
+
+    # Session khác (tương đương một worker khác) thấy cùng tiến độ.
+    with Session(engine) as session:
+        job = crud_job.get_job(session, job_id="test-job")
+        assert (job.status, job.done, job.percent) == (BackgroundJob.RUNNING, 4, 40)
+
+        crud_job.finish_job(session, job_id="test-job")
+        session.refresh(job)
+        assert (job.status, job.percent) == (BackgroundJob.DONE, 100)
+
+
+def test_stale_running_job_is_reported_as_interrupted(migrated_db):
+    from app.core.config import settings
+    from app.crud import crud_job
+    from app.db.session import engine
+    from app.models.job_models import BackgroundJob
+    from app.models.post_models import utc_now
+
+    with Session(engine) as session:
+        crud_job.start_job(session, job_id="stale-job", description="Stale", total=10)
+        # Giả lập worker đã dừng: tiến độ không được cập nhật lâu hơn JOB_STALE_SECONDS.
+        last_update = utc_now() - datetime.timedelta(seconds=settings.JOB_STALE_SECONDS + 1)
+        session.exec(update(BackgroundJob).where(BackgroundJob.id == "stale-job").values(updated_at=last_update))
+        session.commit()
+
+        job = crud_job.get_job(session, job_id="stale-job")
+        assert job.status == BackgroundJob.FAILED
+        assert job.error == crud_job.JOB_INTERRUPTED_ERROR
+
+        restarted = crud_job.start_job(session, job_id="stale-job", description="Stale", total=10)
+        assert restarted is not None and restarted.is_running and restarted.done == 0
@@ -0,0 +1,68 @@
+from sqlmodel import Session, select
+
+
+def _auth_headers(username):
+    from app.core import security
+    from app.crud import crud_user
+    from app.db.session import engine
+    from app.models.user_models import UserCreate
+
+    with Session(engine) as session:
+        user = crud_user.create_db_user(
+            session,
+            UserCreate(username=username, email=f"{username}@example.com", password="secret123"),
+            hashed_password="x",
+        )
+    return {"Authorization": f"Bearer {security.create_access_token(data=security.access_token_claims(user))}"}
+
+
+def _ref_count(path):
+    from app.db.session import engine
+    from app.models.upload_models import Upload
+
+    with Session(engine) as session:
+        db_upload = session.exec(select(Upload).where(Upload.path == path)).first()
+        return db_upload.ref_count if db_upload else 0
+
+
+def test_api_post_holds_a_reference_to_its_uploaded_image(client):
+    from app.db.session import engine
+    from app.models.upload_models import Upload
+
+    path = "uploads/images/ab/cd/shared_post_full.jpg"
+    variants = {"full": {"path": path, "width": 800, "height": 600}}
+    with Session(engine) as session:
+        session.add(Upload(key="shared:post", path=path, variants=variants, size_bytes=10))
+        session.commit()
+    headers = _auth_headers("imageowner")
+
+    response = client.post("/api/v1/posts/", headers=headers, json={
+        "title": "Ảnh dùng chung", "content": "...", "featured_image_url": path,
+        # Biến thể do server tạo, client không ghi được.
+        "featured_image_variants": {"full": {"path": "uploads/images/other.jpg"}},
+    })
+    assert response.status_code == 201
+    assert response.json()["featured_image_variants"] == variants
+    assert _ref_count(path) == 2
+    post_id = response.json()["id"]
+
+    response = client.put(f"/api/v1/posts/{post_id}", headers=headers, json={"featured_image_url": path})
+    assert response.status_code == 200
+    assert _ref_count(path) == 2
+
+    response = client.put(f"/api/v1/posts/{post_id}", headers=headers, json={"featured_image_url": None})
+    assert response.status_code == 200
+    assert _ref_count(path) == 1
+
+    response = client.put(f"/api/v1/posts/{post_id}", headers=headers, json={"featured_image_url": path})
+    assert _ref_count(path) == 2
+    assert client.delete(f"/api/v1/posts/{post_id}", headers=headers).status_code == 200
+    assert _ref_count(path) == 1
+
+
+def test_api_rejects_unknown_upload_paths(client):
+    headers = _auth_headers("imageguesser")
+    response = client.post("/api/v1/posts/", headers=headers, json={
+        "title": "Ảnh lạ", "content": "...", "featured_image_url": "uploads/images/legacy.jpg",
+    })
+    assert response.status_code == 400
@@ -0,0 +1,86 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+# Số câu SQL tối đa cho mỗi request danh sách, không phụ thuộc số bài viết trên trang.
+# Vượt giới hạn này gần như chắc chắn là N+1 (lazy load owner/tags/comments theo từng bài).
+HOME_PAGE_MAX_STATEMENTS = 4
+API_LIST_MAX_STATEMENTS = 5
+NUM_POSTS = 20
+
+
+@contextlib.contextmanager
+def count_statements(*engines):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    targets = [getattr(engine, "sync_engine", engine) for engine in engines]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(scope="module")
+def seeded_posts(migrated_db):
+    from app.db.session import engine
+    from app.crud import crud_comment, crud_post, crud_user
+    from app.models.comment_models import CommentCreate
+    from app.models.post_models import PostCreate
+    from app.models.user_models import UserCreate
+
+    with Session(engine) as session:
+        owners = [
+            crud_user.create_db_user(
+                session,
+                UserCreate(username=f"author{i}", email=f"author{i}@example.com", password="secret123"),
+                hashed_password="x",
+            )
+            for i in range(4)
+        ]
+        for i in range(NUM_POSTS):
+            owner = owners[i % len(owners)]
+            post = crud_post.create_db_post(
+                session=session,
+                post_in=PostCreate(title=f"Post {i}", content="docker " * 50, tags=[f"tag{i % 5}", "devops"]),
+                owner_id=owner.id,
+            )
+            for j in range(3):
+                crud_comment.create_db_comment(
+                    session=session, comment_in=CommentCreate(text=f"comment {j}"),
+                    post_id=post.id, owner_id=owners[j % len(owners)].id,
+                )
+    return NUM_POSTS
+
+
+@pytest.mark.parametrize("page_size", [5, 20])
+def test_home_page_statement_count_is_constant(client, seeded_posts, page_size):
+    from app.db.session import engine, async_engine
+
+    with count_statements(engine, async_engine) as statements:
+        response = client.get("/", params={"page_size": page_size})
+    assert response.status_code == 200
+    assert response.text.count("blog-post-card") == page_size
+    assert len(statements) <= HOME_PAGE_MAX_STATEMENTS, statements
+
+
+@pytest.mark.parametrize("view", ["full", "summary"])
+@pytest.mark.parametrize("page_size", [5, 20])
+def test_api_post_list_statement_count_is_constant(client, seeded_posts, view, page_size):
+    from app.db.session import engine, async_engine
+
+    with count_statements(engine, async_engine) as statements:
+        response = client.get("/api/v1/posts/", params={"page_size": page_size, "view": view})
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert len(items) == page_size
+    if view == "full":
+        assert all(item["owner"] and item["tags"] and len(item["comments"]) == 3 for item in items)
+    assert len(statements) <= API_LIST_MAX_STATEMENTS, statements
@@ -0,0 +1,37 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    from app.core.static_assets import CONTENT_HASHED_PREFIXES, PrecompressedStaticFiles
+
+    asset_dir = tmp_path / CONTENT_HASHED_PREFIXES[0].rstrip("/")
+    asset_dir.mkdir(parents=True)
+    body = b"body { color: red; }\n" * 20
+    (asset_dir / "site.0123abcd.css").write_bytes(body)
+    (asset_dir / "site.0123abcd.css.gz").write_bytes(gzip.compress(body))
+
+    app = Starlette(routes=[Mount("/static", app=PrecompressedStaticFiles(directory=tmp_path), name="static")])
+    with TestClient(app) as client:
+        yield client, f"/static/{CONTENT_HASHED_PREFIXES[0]}site.0123abcd.css"
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("*", "gzip"),
+    ("br;q=1, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("*, gzip;q=0", None),
+    ("identity", None),
+])
+def test_precompressed_negotiation_matches_compression_middleware(static_client, accept_encoding, expected):
+    # Cùng bộ phân tích Accept-Encoding với CompressionMiddleware: "*" và q=0 được xử lý như nhau.
+    client, url = static_client
+    response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected